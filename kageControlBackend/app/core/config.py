@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,6 +12,36 @@ class Settings:
     MYSQL_DB: str = os.getenv("MYSQL_DB")
     JWT_SECRET: str = os.getenv("JWT_SECRET")
     ALGORITHM: str = "HS256"
+    # Reportes PDF en segundo plano
+    REPORT_WORKERS: int = int(os.getenv("REPORT_WORKERS", "2"))
+    REPORT_QUEUE_DEPTH: int = int(os.getenv("REPORT_QUEUE_DEPTH", "8"))
+    REPORT_JOB_RETENTION: int = int(os.getenv("REPORT_JOB_RETENTION", "50"))
+    REPORT_CACHE_DIR: str = os.getenv("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "kagecontrol_reports"))
+    REPORT_CACHE_MAX_BYTES: int = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+    # WebSocket: cola de salida por cliente
+    WS_QUEUE_SIZE: int = int(os.getenv("WS_QUEUE_SIZE", "100"))
+    WS_OVERFLOW_POLICY: str = os.getenv("WS_OVERFLOW_POLICY", "drop_oldest")  # drop_oldest | disconnect
+    WS_SEND_TIMEOUT: float = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+    # Bus de eventos: "memory" (un worker) o "redis" (varios workers/procesos)
+    EVENT_BUS_BACKEND: str = os.getenv("EVENT_BUS_BACKEND", "memory")
+    EVENT_BUS_URL: str = os.getenv("EVENT_BUS_URL", "redis://localhost:6379/0")
+    EVENT_BUS_CHANNEL: str = os.getenv("EVENT_BUS_CHANNEL", "kagecontrol:events")
+    # Despacho local de eventos: tareas consumidoras, tamaño de cada cola y espera máxima al encolar
+    EVENT_WORKERS: int = int(os.getenv("EVENT_WORKERS", "4"))
+    EVENT_QUEUE_SIZE: int = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+    EVENT_ENQUEUE_TIMEOUT: float = float(os.getenv("EVENT_ENQUEUE_TIMEOUT", "1"))
+    # Ventana para agrupar cambios de estado de órdenes en un solo frame (0 = sin agrupar)
+    EVENT_COALESCE_MS: int = int(os.getenv("EVENT_COALESCE_MS", "50"))
+    # Asignación de mesas: "best_fit" (la más pequeña donde cabe) o "zone" (primero la zona pedida en preferences)
+    TABLE_ASSIGNMENT_STRATEGY: str = os.getenv("TABLE_ASSIGNMENT_STRATEGY", "best_fit")
+    # Cola de cocina: minutos de SLA por defecto y por estación ("parrilla:20,postres:8")
+    KITCHEN_SLA_MINUTES: int = int(os.getenv("KITCHEN_SLA_MINUTES", "15"))
+    KITCHEN_STATION_SLA: str = os.getenv("KITCHEN_STATION_SLA", "")
+    # Instrumentación SQL: umbral de consulta lenta, repeticiones que se marcan como N+1
+    # y headers X-DB-Query-Count / X-DB-Query-Time-Ms (solo para desarrollo)
+    SQL_SLOW_QUERY_MS: float = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+    SQL_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    SQL_DEBUG_HEADERS: bool = os.getenv("SQL_DEBUG_HEADERS", "false").lower() in ("1", "true", "yes")
 
     @property
     def database_url(self):
@@ -19,4 +50,11 @@ class Settings:
             f"@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
         )
 
+    @property
+    def async_database_url(self):
+        return (
+            f"mysql+aiomysql://{self.MYSQL_USER}:{self.MYSQL_PASS}"
+            f"@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
+        )
+
 settings = Settings()
@@ -1,14 +1,91 @@
-from sqlalchemy import create_engine
+import functools
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core import metrics
 
 engine = create_engine(settings.database_url, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Motor asíncrono para las rutas async: no bloquea el event loop en cada consulta
+async_engine = create_async_engine(settings.async_database_url, pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+@event.listens_for(engine, "before_cursor_execute")
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(engine, "after_cursor_execute")
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    metrics.record_query(statement, time.perf_counter() - started)
+
+@event.listens_for(engine, "handle_error")
+@event.listens_for(async_engine.sync_engine, "handle_error")
+def _discard_failed_query(context):
+    # La sentencia falló y no habrá after_cursor_execute que saque su marca de inicio
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+def _pool_stat(method: str):
+    def collect():
+        values = {}
+        for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+            stat = getattr(pool, method, None)
+            if stat is not None:
+                values[(name,)] = stat()
+        return values
+    return collect
+
+metrics.Gauge("db_pool_size", "Tamaño configurado del pool de conexiones", ("pool",), _pool_stat("size"))
+metrics.Gauge("db_pool_checked_out", "Conexiones prestadas en este momento", ("pool",), _pool_stat("checkedout"))
+metrics.Gauge("db_pool_checked_in", "Conexiones libres en el pool", ("pool",), _pool_stat("checkedin"))
+metrics.Gauge("db_pool_overflow", "Conexiones abiertas por encima del tamaño del pool", ("pool",), _pool_stat("overflow"))
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Código de MySQL cuando InnoDB aborta una transacción por deadlock
+MYSQL_DEADLOCK = 1213
+DEADLOCK_ATTEMPTS = 3
+
+def is_deadlock(error: Exception) -> bool:
+    orig = getattr(error, "orig", None)
+    return isinstance(error, DBAPIError) and bool(getattr(orig, "args", None)) and orig.args[0] == MYSQL_DEADLOCK
+
+def retry_on_deadlock(fn):
+    """Repetir la transacción completa si MySQL la aborta por deadlock.
+
+    InnoDB revierte toda la transacción de la víctima, así que se reintenta la
+    función entera (que debe empezar y confirmar su propia transacción).
+    """
+    @functools.wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        for attempt in range(1, DEADLOCK_ATTEMPTS + 1):
+            try:
+                return fn(db, *args, **kwargs)
+            except DBAPIError as e:
+                if not is_deadlock(e) or attempt == DEADLOCK_ATTEMPTS:
+                    raise
+                db.rollback()
+                print(f"🔒 Deadlock en {fn.__name__}, reintento {attempt}/{DEADLOCK_ATTEMPTS - 1}.")
+    return wrapper
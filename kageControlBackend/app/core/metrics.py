@@ -0,0 +1,289 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+# Clave en Session.info con observaciones que solo cuentan si la transacción se confirma
+PENDING_OBSERVATIONS = "pending_observations"
+
+# Límites (en segundos) para latencias de cocina: de 30 s a 1 h
+KITCHEN_BUCKETS = (30, 60, 120, 300, 600, 900, 1200, 1800, 2700, 3600)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Todas las métricas, en orden de registro, para /metrics
+REGISTRY: List = []
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+class Counter:
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(dict(zip(self.labels, key)))} {_format_value(value)}")
+        return lines
+
+class Gauge:
+    """Valor leído al momento de exportar: `collect` devuelve {tupla de etiquetas: valor}"""
+
+    def __init__(self, name: str, description: str, labels: Iterable[str], collect: Callable[[], Dict[tuple, float]],
+                 kind: str = "gauge"):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.collect = collect
+        self.kind = kind
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            values = self.collect()
+        except Exception as e:
+            print(f"⚠️ No se pudo leer la métrica {self.name}: {e}")
+            values = {}
+        for key, value in values.items():
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labels, key)))} {_format_value(value)}")
+        return lines
+
+class _Series:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.count = 0
+        self.sum = 0.0
+
+class Histogram:
+    """Histograma en memoria con etiquetas, al estilo Prometheus.
+
+    Cada combinación de etiquetas tiene sus propios contadores por bucket;
+    los cuantiles se estiman interpolando dentro del bucket.
+    """
+
+    def __init__(self, name: str, description: str, labels: Iterable[str], buckets: Iterable[float]):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, _Series] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.buckets)
+            series.counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.count += 1
+            series.sum += value
+
+    def _quantile(self, series: _Series, q: float) -> float:
+        rank = q * series.count
+        seen = 0
+        for i, count in enumerate(series.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return 0.0
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            result = []
+            for key, series in sorted(self._series.items()):
+                cumulative, total = [], 0
+                for le, count in zip(self.buckets + ("+Inf",), series.counts):
+                    total += count
+                    cumulative.append((le, total))
+                result.append({
+                    "labels": dict(zip(self.labels, key)),
+                    "count": series.count,
+                    "sum": series.sum,
+                    "avg": series.sum / series.count if series.count else 0.0,
+                    "p50": self._quantile(series, 0.5),
+                    "p90": self._quantile(series, 0.9),
+                    "p99": self._quantile(series, 0.99),
+                    "buckets": cumulative,
+                })
+            return result
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for series in self.snapshot():
+            for le, count in series["buckets"]:
+                labels = dict(series["labels"], le=_format_value(float(le)) if le != "+Inf" else le)
+                lines.append(f"{self.name}_bucket{_format_labels(labels)} {count}")
+            labels = _format_labels(series["labels"])
+            lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Instancia global: tiempo que una orden pasa en cada estado antes de avanzar
+kitchen_latency = Histogram(
+    "kitchen_status_latency_seconds",
+    "Segundos entre cambios de estado de una orden, por estación y transición",
+    labels=("station", "transition"),
+    buckets=KITCHEN_BUCKETS,
+)
+
+def observe_on_commit(db: Session, histogram: Histogram, value: float, **labels):
+    db.info.setdefault(PENDING_OBSERVATIONS, []).append((histogram, value, labels))
+
+@event.listens_for(Session, "after_commit")
+def _observe_committed(session):
+    for histogram, value, labels in session.info.pop(PENDING_OBSERVATIONS, []):
+        histogram.observe(value, **labels)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_observations(session):
+    session.info.pop(PENDING_OBSERVATIONS, None)
+
+# --- Peticiones HTTP ---
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Duración de las peticiones HTTP por método y ruta",
+    labels=("method", "route"),
+    buckets=LATENCY_BUCKETS,
+)
+http_requests = Counter(
+    "http_requests_total",
+    "Peticiones HTTP por método, ruta y código de estado",
+    labels=("method", "route", "status"),
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request",
+    "Consultas SQL ejecutadas por petición HTTP",
+    labels=("method", "route"),
+    buckets=COUNT_BUCKETS,
+)
+
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Duración de cada sentencia SQL",
+    labels=(),
+    buckets=LATENCY_BUCKETS,
+)
+db_slow_queries = Counter(
+    "db_slow_queries_total",
+    "Sentencias SQL por encima de SQL_SLOW_QUERY_MS, por ruta",
+    labels=("route",),
+)
+db_n_plus_one_suspects = Counter(
+    "db_n_plus_one_suspects_total",
+    "Peticiones que repitieron la misma sentencia SQL al menos SQL_N_PLUS_ONE_THRESHOLD veces",
+    labels=("route",),
+)
+
+class RequestStats:
+    """Consultas SQL de una petición: total, tiempo y repeticiones por sentencia"""
+
+    def __init__(self, request: Request):
+        self.request = request
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, int] = {}
+
+    @property
+    def route(self) -> str:
+        return f"{self.request.method} {_route_label(self.request)}"
+
+# Estadísticas de la petición en curso; es un objeto mutable para que las
+# consultas hechas en el threadpool o en el greenlet de run_sync sumen al mismo
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "current_request", default=None
+)
+
+def _short(statement: str, limit: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+def record_query(statement: str, seconds: float):
+    """Llamado por los hooks del engine después de cada sentencia"""
+    db_query_duration.observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += seconds
+        # Misma sentencia con distintos parámetros (p. ej. un lazy load en un bucle)
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+    if seconds * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        route = stats.route if stats is not None else "sin petición"
+        if stats is not None:
+            db_slow_queries.inc(route=_route_label(stats.request))
+        print(f"🐢 Consulta lenta ({seconds * 1000:.0f} ms) en {route}: {_short(statement)}")
+
+def _report_n_plus_one(stats: RequestStats):
+    suspects = [
+        (statement, count) for statement, count in stats.statements.items()
+        if count >= settings.SQL_N_PLUS_ONE_THRESHOLD
+    ]
+    if not suspects:
+        return
+    db_n_plus_one_suspects.inc(route=_route_label(stats.request))
+    for statement, count in suspects:
+        print(f"🔁 Posible N+1 en {stats.route}: {count} ejecuciones de {_short(statement)}")
+
+def _route_label(request: Request) -> str:
+    # La plantilla de la ruta (/orders/{order_id}) y no la URL, para acotar las etiquetas
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+async def track_requests(request: Request, call_next):
+    stats = RequestStats(request)
+    token = current_request.set(stats)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        if settings.SQL_DEBUG_HEADERS:
+            response.headers["X-DB-Query-Count"] = str(stats.queries)
+            response.headers["X-DB-Query-Time-Ms"] = f"{stats.seconds * 1000:.1f}"
+        return response
+    finally:
+        current_request.reset(token)
+        route = _route_label(request)
+        http_request_duration.observe(time.perf_counter() - started, method=request.method, route=route)
+        http_requests.inc(method=request.method, route=route, status=status)
+        db_queries_per_request.observe(stats.queries, method=request.method, route=route)
+        _report_n_plus_one(stats)
@@ -1,6 +1,8 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import Base, engine
+from app.core.database import Base, engine, async_engine, AsyncSessionLocal
+from app.core.metrics import track_requests
 from app.routers import (
     auth,
     users,
@@ -10,10 +12,16 @@ from app.routers import (
     kitchen,
     ingredients,
     menu,
-    reports
+    reports,
+    metrics
 )
 from app.websocket import endpoints as websocket_endpoints
+from app.websocket.event_bus import event_bus
 from app.websocket.event_listeners import register_listeners
+from app.services.kitchen_queue_service import kitchen_queue
+from app.services.report_job_service import report_jobs
+from app.utils.entity_versions import entity_versions
+from app.utils.report_cache import report_cache
 
 # Crear las tablas de la base de datos si no existen
 Base.metadata.create_all(bind=engine)
@@ -28,8 +36,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-DB-Query-Count", "X-DB-Query-Time-Ms"],
 )
 
+# Latencia, códigos de estado y consultas SQL por ruta para /metrics
+app.middleware("http")(track_requests)
+
 # Routers REST
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -40,9 +52,24 @@ app.include_router(kitchen.router)
 app.include_router(ingredients.router)
 app.include_router(menu.router)
 app.include_router(reports.router)
+app.include_router(metrics.router)
 
 # WebSocket endpoints
 app.include_router(websocket_endpoints.router)
 
 # Registro de listeners de eventos
 register_listeners()
+
+@app.on_event("startup")
+async def startup():
+    entity_versions.bind_loop(asyncio.get_running_loop())
+    report_cache.bind_loop(asyncio.get_running_loop())
+    async with AsyncSessionLocal() as db:
+        await kitchen_queue.rebuild(db)
+    await event_bus.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await event_bus.stop()
+    report_jobs.shutdown()
+    await async_engine.dispose()
@@ -1,6 +1,7 @@
 from .user import User, UserRole
 from .table import Table, TableStatus
 from .arrival import Arrival
-from .order import Order, OrderDish, OrderStatus
+from .order import Order, OrderDish, OrderStatus, OrderStatusHistory
 from .dish import Dish
 from .ingredient import Ingredient, DishIngredient
+from .stats import ArrivalStats, DishSalesStats, StatsGranularity
@@ -10,6 +10,6 @@ class Arrival(Base):
     contact = Column(String(20))
     preferences = Column(Text)
     table_id = Column(Integer, ForeignKey("tables.id"))
-    assigned_at = Column(DateTime)
+    assigned_at = Column(DateTime, index=True)
 
     table = relationship("Table")
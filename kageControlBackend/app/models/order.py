@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Enum, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import enum
@@ -30,3 +30,13 @@ class OrderDish(Base):
 
     order = relationship("Order", back_populates="dishes")
     dish = relationship("Dish")
+
+class OrderStatusHistory(Base):
+    """Cada cambio de estado de una orden, escrito en la misma transacción que el cambio"""
+    __tablename__ = "order_status_history"
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    from_status = Column(Enum(OrderStatus))  # None al crear la orden
+    to_status = Column(Enum(OrderStatus), nullable=False)
+    station = Column(String(50))
+    changed_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, DateTime, Enum, ForeignKey
+from app.core.database import Base
+import enum
+
+class StatsGranularity(str, enum.Enum):
+    hour = "hour"
+    day = "day"
+
+class ArrivalStats(Base):
+    __tablename__ = "arrival_stats"
+    granularity = Column(Enum(StatsGranularity), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    arrivals = Column(Integer, nullable=False, default=0)
+    diners = Column(Integer, nullable=False, default=0)
+    groups_1_2 = Column(Integer, nullable=False, default=0)
+    groups_3_4 = Column(Integer, nullable=False, default=0)
+    groups_5_6 = Column(Integer, nullable=False, default=0)
+    groups_7_plus = Column(Integer, nullable=False, default=0)
+
+class DishSalesStats(Base):
+    __tablename__ = "dish_sales_stats"
+    granularity = Column(Enum(StatsGranularity), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    dish_id = Column(Integer, ForeignKey("dishes.id"), primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,12 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repository import arrival_repo
+from app.schemas.arrival import ArrivalCreate
+
+# Variantes async: reutilizan la lógica síncrona del repositorio mediante
+# run_sync, que ejecuta cada consulta sobre el driver aiomysql sin bloquear el loop.
+
+async def create_arrival(db: AsyncSession, data: ArrivalCreate):
+    return await db.run_sync(arrival_repo.create_arrival, data)
+
+async def get_all_arrivals(db: AsyncSession):
+    return await db.run_sync(arrival_repo.get_all_arrivals)
@@ -0,0 +1,12 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repository import dish_repo
+from app.schemas.dish import DishCreate
+
+async def create_dish(db: AsyncSession, dish_data: DishCreate):
+    return await db.run_sync(dish_repo.create_dish, dish_data)
+
+async def get_all_dishes(db: AsyncSession):
+    return await db.run_sync(dish_repo.get_all_dishes)
+
+async def get_available_dishes(db: AsyncSession):
+    return await db.run_sync(dish_repo.get_available_dishes)
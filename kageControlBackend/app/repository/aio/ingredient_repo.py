@@ -0,0 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repository import ingredient_repo
+from app.schemas.ingredient import IngredientCreate
+
+async def create_ingredient(db: AsyncSession, ingredient: IngredientCreate):
+    return await db.run_sync(ingredient_repo.create_ingredient, ingredient)
+
+async def get_all_ingredients(db: AsyncSession):
+    return await db.run_sync(ingredient_repo.get_all_ingredients)
+
+async def get_ingredient_by_id(db: AsyncSession, ingredient_id: int):
+    return await db.run_sync(ingredient_repo.get_ingredient_by_id, ingredient_id)
+
+async def delete_ingredient(db: AsyncSession, ingredient_id: int):
+    return await db.run_sync(ingredient_repo.delete_ingredient, ingredient_id)
@@ -0,0 +1,27 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repository import order_repo
+from app.schemas.order import OrderCreate
+from typing import List
+from app.models.order import OrderStatus
+
+async def create_order(db: AsyncSession, data: OrderCreate):
+    return await db.run_sync(order_repo.create_order, data)
+
+async def create_orders(db: AsyncSession, items: List[OrderCreate]):
+    return await db.run_sync(order_repo.create_orders, items)
+
+async def get_orders_by_arrival(db: AsyncSession, arrival_id: int):
+    return await db.run_sync(order_repo.get_orders_by_arrival, arrival_id)
+
+async def get_all_orders(db: AsyncSession):
+    return await db.run_sync(order_repo.get_all_orders)
+
+async def get_active_orders(db: AsyncSession):
+    return await db.run_sync(order_repo.get_active_orders)
+
+async def update_order_status(db: AsyncSession, order_id: int, status: OrderStatus):
+    order = await db.run_sync(order_repo.update_order_status, order_id, status)
+    if order:
+        # La respuesta serializa order.dishes; se carga aquí para evitar un lazy load fuera del loop
+        await db.refresh(order, attribute_names=["dishes"])
+    return order
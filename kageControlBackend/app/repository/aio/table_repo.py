@@ -0,0 +1,24 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repository import table_repo
+from app.models.table import TableStatus
+
+async def get_tables(db: AsyncSession):
+    return await db.run_sync(table_repo.get_tables)
+
+async def get_table_by_id(db: AsyncSession, table_id: int):
+    return await db.run_sync(table_repo.get_table_by_id, table_id)
+
+async def get_table_by_name(db: AsyncSession, name: str):
+    return await db.run_sync(table_repo.get_table_by_name, name)
+
+async def update_table_status(db: AsyncSession, table_id: int, status: TableStatus):
+    return await db.run_sync(table_repo.update_table_status, table_id, status)
+
+async def update_table(db: AsyncSession, table_id: int, capacity: int = None, status: TableStatus = None):
+    return await db.run_sync(table_repo.update_table, table_id, capacity, status)
+
+async def delete_table(db: AsyncSession, table_id: int):
+    return await db.run_sync(table_repo.delete_table, table_id)
+
+async def create_table(db: AsyncSession, name: str, capacity: int):
+    return await db.run_sync(table_repo.create_table, name, capacity)
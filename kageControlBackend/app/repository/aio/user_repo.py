@@ -0,0 +1,21 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repository import user_repo
+from app.schemas.user import UserCreate
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    return await db.run_sync(user_repo.get_user_by_username, username)
+
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    return await db.run_sync(user_repo.get_user_by_id, user_id)
+
+async def get_all_users(db: AsyncSession):
+    return await db.run_sync(user_repo.get_all_users)
+
+async def create_user(db: AsyncSession, user: UserCreate):
+    return await db.run_sync(user_repo.create_user, user)
+
+async def update_user(db: AsyncSession, user_id: int, updates: dict):
+    return await db.run_sync(user_repo.update_user, user_id, updates)
+
+async def delete_user(db: AsyncSession, user_id: int):
+    return await db.run_sync(user_repo.delete_user, user_id)
@@ -1,37 +1,135 @@
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select, update, func
 from sqlalchemy.orm import Session
 from datetime import datetime
+from app.core.database import retry_on_deadlock
 from app.models.arrival import Arrival
 from app.models.table import TableStatus
 from app.schemas.arrival import ArrivalCreate
 from app.models import Table
+from app.repository import stats_repo
+from app.utils.entity_versions import mark_changed
+from app.utils.pagination import keyset
+from app.utils.table_index import table_index, mark_table_change
 
+class TableNotFoundError(Exception):
+    pass
+
+class TableNotAvailableError(Exception):
+    pass
+
+def _claim(db: Session, table_id: int) -> bool:
+    """Ocupar la mesa solo si sigue libre; la fila queda bloqueada hasta el commit"""
+    result = db.execute(
+        update(Table)
+        .where(Table.id == table_id, Table.status == TableStatus.free)
+        .values(status=TableStatus.occupied)
+    )
+    if result.rowcount != 1:
+        return False
+    # El UPDATE directo no dispara los eventos del mapper: se avisa al índice y a los ETags
+    mark_table_change(db, table_id, status=TableStatus.occupied)
+    mark_changed(db, "tables")
+    return True
+
+def _claim_first_free(db: Session, candidates: Iterable[int]) -> Tuple[Optional[int], List[int]]:
+    """Reclamar la primera candidata libre, en el orden del índice.
+
+    Cada candidata se bloquea por separado (por clave primaria, así solo se
+    bloquea esa fila) y se salta si otra transacción la tiene bloqueada.
+    Devuelve la mesa reclamada y las candidatas saltadas por estar bloqueadas.
+    """
+    locked = []
+    for table_id in candidates:
+        row = db.execute(
+            select(Table.id, Table.status)
+            .where(Table.id == table_id)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if row is None:
+            locked.append(table_id)
+        elif row.status == TableStatus.free and _claim(db, table_id):
+            return table_id, locked
+    return None, locked
+
+def _claim_after_wait(db: Session, candidates: Iterable[int]) -> Optional[int]:
+    """Reintento sobre las candidatas que estaban bloqueadas: el UPDATE condicional
+    espera a que la otra transacción termine y solo ocupa la mesa si sigue libre"""
+    for table_id in candidates:
+        if _claim(db, table_id):
+            return table_id
+    return None
+
+def _claim_from_index(db: Session, data: ArrivalCreate) -> Optional[int]:
+    # La mesa más pequeña donde cabe el grupo según el índice de capacidad
+    table_index.ensure_loaded(db)
+    table_id, locked = _claim_first_free(db, table_index.candidates(data.party_size, data.preferences))
+    if table_id is None and locked:
+        # Otro host está reclamando esas mesas: se sueltan los bloqueos propios
+        # (aún no se escribió nada) y se espera a que confirme o libere
+        db.rollback()
+        table_id = _claim_after_wait(db, locked)
+    return table_id
+
+@retry_on_deadlock
 def create_arrival(db: Session, data: ArrivalCreate):
     # Si se especifica una mesa específica, usarla
     if hasattr(data, 'table_id') and data.table_id:
-        table = db.query(Table).filter(Table.id == data.table_id, Table.status == TableStatus.free).first()
-        if not table:
-            return None
+        table_id = data.table_id
+        if not _claim(db, table_id):
+            exists = db.execute(select(Table.id).where(Table.id == table_id)).scalar()
+            db.rollback()
+            if exists is None:
+                raise TableNotFoundError("La mesa especificada no existe")
+            raise TableNotAvailableError("La mesa especificada no está disponible")
     else:
-        # Buscar una mesa libre automáticamente
-        table = db.query(Table).filter(Table.status == TableStatus.free).first()
-        if not table:
+        table_id = _claim_from_index(db, data)
+        if table_id is None:
+            # Puede que el índice esté desactualizado: se recarga desde la base y se
+            # intenta una vez más antes de responder que no hay mesas
+            db.rollback()
+            table_index.invalidate()
+            table_id = _claim_from_index(db, data)
+        if table_id is None:
+            db.rollback()
             return None
-    
-    # Cambiar el estado de la mesa a ocupada
-    table.status = TableStatus.occupied
-    
+
     # Crear la llegada con los datos del formulario
     arrival_data = data.dict(exclude={'table_id'})  # Excluir table_id de los datos
     arrival = Arrival(
         **arrival_data,
-        table_id=table.id,
+        table_id=table_id,
         assigned_at=datetime.utcnow()
     )
-    
-    db.add(arrival)
-    db.commit()
+
+    try:
+        db.add(arrival)
+        stats_repo.record_arrival(db, arrival)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     db.refresh(arrival)
     return arrival
 
 def get_all_arrivals(db: Session):
     return db.query(Arrival).all()
+
+def list_arrivals(db: Session, table_id: Optional[int] = None, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None, active: bool = False,
+                  limit: Optional[int] = None, after_id: Optional[int] = None):
+    query = db.query(Arrival)
+    if active:
+        # La llegada más reciente de cada mesa ocupada: los comensales sentados ahora
+        latest = select(func.max(Arrival.id)).group_by(Arrival.table_id)
+        query = (
+            query.join(Table, Table.id == Arrival.table_id)
+            .filter(Table.status == TableStatus.occupied, Arrival.id.in_(latest))
+        )
+    if table_id is not None:
+        query = query.filter(Arrival.table_id == table_id)
+    if start:
+        query = query.filter(Arrival.assigned_at >= start)
+    if end:
+        query = query.filter(Arrival.assigned_at <= end)
+    return keyset(query, Arrival.id, limit, after_id)
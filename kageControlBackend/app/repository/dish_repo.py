@@ -1,6 +1,7 @@
+from sqlalchemy import select, func, case
 from sqlalchemy.orm import Session, joinedload
 from app.models.dish import Dish
-from app.models.ingredient import DishIngredient
+from app.models.ingredient import DishIngredient, Ingredient
 from app.schemas.dish import DishCreate
 
 def create_dish(db: Session, dish_data: DishCreate):
@@ -27,10 +28,37 @@ def get_all_dishes(db: Session):
     return db.query(Dish).options(joinedload(Dish.ingredients)).all()
 
 def get_available_dishes(db: Session):
-    dishes = db.query(Dish).options(joinedload(Dish.ingredients)).all()
-    available = []
-    for dish in dishes:
-        enough = all(di.ingredient.stock >= di.quantity_needed for di in dish.ingredients)
-        if enough:
-            available.append(dish)
-    return available
+    """Platillos con stock suficiente de todos sus ingredientes, en una sola consulta.
+
+    Cada platillo lleva `portions_available`: cuántas porciones alcanzan con el
+    stock actual (None si no tiene receta, es decir, sin límite).
+    """
+    availability = (
+        select(
+            Dish.id.label("dish_id"),
+            func.min(func.floor(Ingredient.stock / DishIngredient.quantity_needed)).label("portions"),
+        )
+        .select_from(Dish)
+        .outerjoin(DishIngredient, DishIngredient.dish_id == Dish.id)
+        .outerjoin(Ingredient, Ingredient.id == DishIngredient.ingredient_id)
+        .group_by(Dish.id)
+        # Ningún renglón de la receta puede quedar sin stock suficiente
+        .having(func.sum(case(
+            (DishIngredient.dish_id.is_(None), 0),
+            (Ingredient.stock >= DishIngredient.quantity_needed, 0),
+            else_=1,
+        )) == 0)
+        .subquery()
+    )
+    rows = (
+        db.query(Dish, availability.c.portions)
+        .join(availability, availability.c.dish_id == Dish.id)
+        .options(joinedload(Dish.ingredients))
+        .order_by(Dish.id)
+        .all()
+    )
+    dishes = []
+    for dish, portions in rows:
+        dish.portions_available = int(portions) if portions is not None else None
+        dishes.append(dish)
+    return dishes
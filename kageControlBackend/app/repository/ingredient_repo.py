@@ -1,6 +1,8 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.models.ingredient import Ingredient
 from app.schemas.ingredient import IngredientCreate
+from app.utils.pagination import keyset
 
 def create_ingredient(db: Session, ingredient: IngredientCreate):
     db_ingredient = Ingredient(**ingredient.dict())
@@ -12,6 +14,15 @@ def create_ingredient(db: Session, ingredient: IngredientCreate):
 def get_all_ingredients(db: Session):
     return db.query(Ingredient).all()
 
+def list_ingredients(db: Session, name: Optional[str] = None, low_stock: Optional[float] = None,
+                     limit: Optional[int] = None, after_id: Optional[int] = None):
+    query = db.query(Ingredient)
+    if name:
+        query = query.filter(Ingredient.name.ilike(f"%{name.strip()}%"))
+    if low_stock is not None:
+        query = query.filter(Ingredient.stock <= low_stock)
+    return keyset(query, Ingredient.id, limit, after_id)
+
 def get_ingredient_by_id(db: Session, ingredient_id: int):
     return db.query(Ingredient).filter(Ingredient.id == ingredient_id).first()
 
@@ -1,40 +1,140 @@
-from sqlalchemy.orm import Session
-from app.models.order import Order, OrderStatus, OrderDish
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import select, update, insert, case, func
+from sqlalchemy.orm import Session, selectinload
+from app.models.arrival import Arrival
+from app.models.order import Order, OrderStatus, OrderDish, OrderStatusHistory
 from app.models.dish import Dish
+from app.models.table import Table
 from app.schemas.order import OrderCreate
-from app.models.ingredient import DishIngredient
+from app.models.ingredient import DishIngredient, Ingredient
+from app.core.database import retry_on_deadlock
+from app.core.metrics import kitchen_latency, observe_on_commit
+from app.repository import stats_repo
+from app.utils.entity_versions import mark_changed
+from app.utils.pagination import keyset
 
 def create_order(db: Session, data: OrderCreate):
-    # Verificar stock
-    for od in data.dishes:
-        dish = db.query(Dish).get(od.dish_id)
-        if not dish:
-            raise Exception(f"Platillo {od.dish_id} no encontrado")
-        for di in dish.ingredients:
-            required = di.quantity_needed * od.quantity
-            if di.ingredient.stock < required:
-                raise Exception(f"No hay suficiente {di.ingredient.name} para {dish.name}")
-
-    order = Order(
-        arrival_id=data.arrival_id,
-        station=data.station,
-        notes=data.notes,
-        status=OrderStatus.pending
-    )
-    db.add(order)
-    db.commit()
-    db.refresh(order)
+    return create_orders(db, [data])[0]
 
-    for od in data.dishes:
-        order_dish = OrderDish(order_id=order.id, dish_id=od.dish_id, quantity=od.quantity)
-        db.add(order_dish)
-        dish = db.query(Dish).get(od.dish_id)
-        for di in dish.ingredients:
-            di.ingredient.stock -= di.quantity_needed * od.quantity
+@retry_on_deadlock
+def create_orders(db: Session, items: List[OrderCreate]):
+    """Crear varias órdenes en una sola transacción.
 
-    db.commit()
-    db.refresh(order)
-    return order
+    El stock de todas las órdenes se valida y descuenta junto, y las filas
+    de order_dishes se insertan en bloque.
+    """
+    # Agrupar cantidades por platillo dentro de cada orden (un platillo puede venir repetido)
+    per_order = []
+    total_quantities = defaultdict(int)
+    for data in items:
+        dish_quantities = defaultdict(int)
+        for od in data.dishes:
+            dish_quantities[od.dish_id] += od.quantity
+            total_quantities[od.dish_id] += od.quantity
+        per_order.append(dish_quantities)
+
+    try:
+        # Platillos y recetas en una sola consulta
+        rows = db.execute(
+            select(Dish.id, Dish.name, DishIngredient.ingredient_id, DishIngredient.quantity_needed)
+            .outerjoin(DishIngredient, DishIngredient.dish_id == Dish.id)
+            .where(Dish.id.in_(total_quantities.keys()))
+        ).all()
+
+        found = {row.id for row in rows}
+        for dish_id in total_quantities:
+            if dish_id not in found:
+                raise Exception(f"Platillo {dish_id} no encontrado")
+
+        required = defaultdict(float)
+        dish_by_ingredient = {}
+        for row in rows:
+            if row.ingredient_id is None or not row.quantity_needed:
+                continue
+            required[row.ingredient_id] += row.quantity_needed * total_quantities[row.id]
+            dish_by_ingredient.setdefault(row.ingredient_id, row.name)
+
+        _decrement_stock(db, required, dish_by_ingredient)
+
+        orders = [
+            Order(
+                arrival_id=data.arrival_id,
+                station=data.station,
+                notes=data.notes,
+                status=OrderStatus.pending
+            )
+            for data in items
+        ]
+        db.add_all(orders)
+        db.flush()
+
+        order_dishes = [
+            {"order_id": order.id, "dish_id": dish_id, "quantity": quantity}
+            for order, dish_quantities in zip(orders, per_order)
+            for dish_id, quantity in dish_quantities.items()
+        ]
+        if order_dishes:
+            db.execute(insert(OrderDish), order_dishes)
+        # Sin microsegundos: es lo que guarda la columna DATETIME y lo que leerá rebuild()
+        now = datetime.utcnow().replace(microsecond=0)
+        db.execute(insert(OrderStatusHistory), [
+            {"order_id": order.id, "from_status": None, "to_status": order.status,
+             "station": order.station, "changed_at": now}
+            for order in orders
+        ])
+        stats_repo.record_orders(db, orders, per_order)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Recargar las órdenes con sus platillos en dos consultas
+    order_ids = [order.id for order in orders]
+    loaded = db.execute(
+        select(Order)
+        .options(selectinload(Order.dishes))
+        .where(Order.id.in_(order_ids))
+        .execution_options(populate_existing=True)
+    ).scalars().all()
+    by_id = {order.id: order for order in loaded}
+    for order in loaded:
+        # Hora de envío a cocina (la del historial); viaja en los eventos de la orden
+        order.fired_at = now
+    return [by_id[order_id] for order_id in order_ids]
+
+def _decrement_stock(db: Session, required: dict, dish_by_ingredient: dict):
+    """Descontar stock con un único UPDATE condicional.
+
+    Solo se actualizan las filas con stock suficiente; si alguna no cumple,
+    el número de filas afectadas no coincide y la transacción se revierte.
+    El bloqueo de fila del UPDATE impide que dos órdenes concurrentes
+    consuman el mismo stock.
+    """
+    if not required:
+        return
+
+    amount = case(required, value=Ingredient.id)
+    result = db.execute(
+        update(Ingredient)
+        .where(Ingredient.id.in_(required.keys()), Ingredient.stock >= amount)
+        .values(stock=Ingredient.stock - amount)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == len(required):
+        mark_changed(db, "ingredients")
+        return
+
+    db.rollback()
+    missing = db.execute(
+        select(Ingredient.id, Ingredient.name, Ingredient.stock)
+        .where(Ingredient.id.in_(required.keys()))
+    ).all()
+    for ing in missing:
+        if ing.stock is None or ing.stock < required[ing.id]:
+            raise Exception(f"No hay suficiente {ing.name} para {dish_by_ingredient[ing.id]}")
+    raise Exception("Ingrediente no encontrado en inventario")
 
 def get_orders_by_arrival(db: Session, arrival_id: int):
     return db.query(Order).filter(Order.arrival_id == arrival_id).all()
@@ -42,11 +142,141 @@ def get_orders_by_arrival(db: Session, arrival_id: int):
 def get_all_orders(db: Session):
     return db.query(Order).all()
 
+def get_order_summaries(db: Session, pending_notes_only: bool = False):
+    """Proyección ligera de órdenes para las vistas de seguimiento, en dos consultas.
+
+    Devuelve las filas de órdenes (con mesa y llegada) y un dict
+    order_id -> [(cantidad, nombre del platillo)]. Con pending_notes_only solo
+    se incluyen órdenes con notas que aún no se han servido.
+    """
+    conditions = []
+    if pending_notes_only:
+        conditions = [
+            Order.notes.isnot(None),
+            func.trim(Order.notes) != "",
+            Order.status != OrderStatus.served,
+        ]
+    orders = db.execute(
+        select(
+            Order.id,
+            Order.status,
+            Order.notes,
+            Order.arrival_id,
+            Arrival.customer_name,
+            Arrival.assigned_at,
+            Table.name.label("table_name"),
+        )
+        .outerjoin(Arrival, Arrival.id == Order.arrival_id)
+        .outerjoin(Table, Table.id == Arrival.table_id)
+        .where(*conditions)
+        .order_by(Order.id)
+    ).all()
+    lines = db.execute(
+        select(OrderDish.order_id, OrderDish.quantity, Dish.name)
+        .join(Order, Order.id == OrderDish.order_id)
+        .join(Dish, Dish.id == OrderDish.dish_id)
+        .where(*conditions)
+    ).all()
+    dishes = defaultdict(list)
+    for line in lines:
+        dishes[line.order_id].append((line.quantity, line.name))
+    return orders, dishes
+
+def get_active_orders(db: Session):
+    """Órdenes no servidas para reconstruir la cola de cocina.
+
+    Devuelve filas (id, arrival_id, station, status, fired_at) y un dict
+    order_id -> [{"dish_id", "quantity"}]. La hora de envío es la de creación
+    en el historial, o la de la llegada para órdenes anteriores al historial.
+    """
+    active = Order.status != OrderStatus.served
+    created = (
+        select(OrderStatusHistory.order_id, func.min(OrderStatusHistory.changed_at).label("created_at"))
+        .group_by(OrderStatusHistory.order_id)
+        .subquery()
+    )
+    orders = db.execute(
+        select(
+            Order.id,
+            Order.arrival_id,
+            Order.station,
+            Order.status,
+            func.coalesce(created.c.created_at, Arrival.assigned_at).label("fired_at"),
+        )
+        .outerjoin(Arrival, Arrival.id == Order.arrival_id)
+        .outerjoin(created, created.c.order_id == Order.id)
+        .where(active)
+        .order_by(Order.id)
+    ).all()
+    lines = db.execute(
+        select(OrderDish.order_id, OrderDish.dish_id, OrderDish.quantity)
+        .join(Order, Order.id == OrderDish.order_id)
+        .where(active)
+    ).all()
+    dishes = defaultdict(list)
+    for line in lines:
+        dishes[line.order_id].append({"dish_id": line.dish_id, "quantity": line.quantity})
+    return orders, dishes
+
+def list_orders(db: Session, status: Optional[List[OrderStatus]] = None, station: Optional[str] = None,
+                arrival_id: Optional[int] = None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                limit: Optional[int] = None, after_id: Optional[int] = None):
+    """Órdenes filtradas y paginadas por id; el rango de fechas es el de la llegada"""
+    query = db.query(Order).options(selectinload(Order.dishes))
+    if status:
+        query = query.filter(Order.status.in_(status))
+    if station:
+        query = query.filter(Order.station == station)
+    if arrival_id is not None:
+        query = query.filter(Order.arrival_id == arrival_id)
+    if start or end:
+        query = query.join(Arrival, Arrival.id == Order.arrival_id)
+        if start:
+            query = query.filter(Arrival.assigned_at >= start)
+        if end:
+            query = query.filter(Arrival.assigned_at <= end)
+    return keyset(query, Order.id, limit, after_id)
+
 def update_order_status(db: Session, order_id: int, status: OrderStatus):
     order = db.query(Order).get(order_id)
     if not order:
         return None
+    if order.status != status:
+        _record_transition(db, order, status)
     order.status = status
     db.commit()
     db.refresh(order)
     return order
+
+def _record_transition(db: Session, order: Order, status: OrderStatus):
+    """Guardar el cambio en el historial y medir cuánto tiempo pasó la orden en su estado anterior"""
+    now = datetime.utcnow()
+    history = db.execute(
+        select(OrderStatusHistory.to_status, OrderStatusHistory.changed_at)
+        .where(OrderStatusHistory.order_id == order.id)
+    ).all()
+    db.add(OrderStatusHistory(
+        order_id=order.id,
+        from_status=order.status,
+        to_status=status,
+        station=order.station,
+        changed_at=now,
+    ))
+    entered = max((h.changed_at for h in history if h.to_status == order.status), default=None)
+    if entered:
+        observe_on_commit(db, kitchen_latency, (now - entered).total_seconds(),
+                          station=order.station, transition=f"{order.status.value}->{status.value}")
+    if status == OrderStatus.served and history:
+        created = min(h.changed_at for h in history)
+        observe_on_commit(db, kitchen_latency, (now - created).total_seconds(),
+                          station=order.station, transition="total")
+
+def get_status_history(db: Session, order_id: int):
+    if db.query(Order.id).filter(Order.id == order_id).first() is None:
+        return None
+    return (
+        db.query(OrderStatusHistory)
+        .filter(OrderStatusHistory.order_id == order_id)
+        .order_by(OrderStatusHistory.changed_at, OrderStatusHistory.id)
+        .all()
+    )
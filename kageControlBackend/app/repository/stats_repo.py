@@ -0,0 +1,176 @@
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Iterable, Optional
+from sqlalchemy import select, delete, func, case, and_, literal
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+from app.models.arrival import Arrival
+from app.models.order import Order, OrderDish
+from app.models.stats import ArrivalStats, DishSalesStats, StatsGranularity
+
+# Las órdenes no tienen marca de tiempo propia: se agregan en el bucket de la
+# llegada a la que pertenecen, tanto en la actualización incremental como en
+# la reconstrucción, para que ambos caminos produzcan los mismos números.
+
+GROUP_COLUMNS = ("groups_1_2", "groups_3_4", "groups_5_6", "groups_7_plus")
+
+# Clave en Session.info con los días cuyos datos cambian al confirmar la transacción
+REPORT_DIRTY_DAYS = "report_dirty_days"
+
+def mark_dirty(db: Session, moment: datetime):
+    db.info.setdefault(REPORT_DIRTY_DAYS, set()).add(moment.date())
+
+def bucket_start(moment: datetime, granularity: StatsGranularity) -> datetime:
+    if granularity == StatsGranularity.hour:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _group_column(party_size: int) -> str:
+    if party_size <= 2:
+        return "groups_1_2"
+    if party_size <= 4:
+        return "groups_3_4"
+    if party_size <= 6:
+        return "groups_5_6"
+    return "groups_7_plus"
+
+def _primary_key(model, row: dict) -> tuple:
+    return tuple(
+        (value.value if hasattr(value, "value") else value)
+        for value in (row[column.name] for column in model.__table__.primary_key.columns)
+    )
+
+def _upsert(db: Session, model, rows: list, counters: Iterable[str]):
+    """INSERT ... ON DUPLICATE KEY UPDATE sumando los contadores a la fila existente.
+
+    Las filas se insertan ordenadas por clave primaria: dos transacciones que
+    tocan los mismos buckets los bloquean en el mismo orden y no se cruzan.
+    """
+    if not rows:
+        return
+    rows = sorted(rows, key=lambda row: _primary_key(model, row))
+    stmt = insert(model).values(rows)
+    stmt = stmt.on_duplicate_key_update({
+        name: getattr(model, name) + stmt.inserted[name] for name in counters
+    })
+    db.execute(stmt)
+
+def record_arrival(db: Session, arrival: Arrival):
+    """Sumar una llegada a los buckets por hora y por día (se confirma con la misma transacción)"""
+    if not arrival.assigned_at:
+        return
+    mark_dirty(db, arrival.assigned_at)
+    party_size = arrival.party_size or 0
+    rows = []
+    for granularity in StatsGranularity:
+        row = {
+            "granularity": granularity,
+            "bucket": bucket_start(arrival.assigned_at, granularity),
+            "arrivals": 1,
+            "diners": party_size,
+        }
+        for column in GROUP_COLUMNS:
+            row[column] = 0
+        if party_size:
+            row[_group_column(party_size)] = 1
+        rows.append(row)
+    _upsert(db, ArrivalStats, rows, ("arrivals", "diners") + GROUP_COLUMNS)
+
+def record_orders(db: Session, orders: list, dish_quantities: list):
+    """Sumar las unidades por platillo de órdenes nuevas a los buckets.
+
+    dish_quantities es paralela a orders: un dict dish_id -> unidades por orden.
+    """
+    moments = _arrival_moments(db, {order.arrival_id for order in orders})
+    sales: Dict[tuple, int] = {}
+    for order, quantities in zip(orders, dish_quantities):
+        moment = moments.get(order.arrival_id)
+        if not moment:
+            continue
+        mark_dirty(db, moment)
+        for granularity in StatsGranularity:
+            bucket = bucket_start(moment, granularity)
+            for dish_id, units in quantities.items():
+                key = (granularity, bucket, dish_id)
+                sales[key] = sales.get(key, 0) + units
+
+    _upsert(db, DishSalesStats, [
+        {"granularity": g, "bucket": b, "dish_id": dish_id, "units": units}
+        for (g, b, dish_id), units in sales.items()
+    ], ("units",))
+
+def _arrival_moments(db: Session, arrival_ids: set) -> Dict[int, datetime]:
+    arrival_ids = {arrival_id for arrival_id in arrival_ids if arrival_id is not None}
+    if not arrival_ids:
+        return {}
+    return dict(db.execute(
+        select(Arrival.id, Arrival.assigned_at).where(Arrival.id.in_(arrival_ids))
+    ).all())
+
+def _bucket_expr(column, granularity: StatsGranularity):
+    if granularity == StatsGranularity.hour:
+        return func.timestamp(func.date(column), func.maketime(func.hour(column), 0, 0))
+    return func.timestamp(func.date(column))
+
+def rebuild(db: Session, start: Optional[date] = None, end: Optional[date] = None):
+    """Recalcular los agregados desde las tablas crudas.
+
+    Si se indica un rango, solo se reconstruyen los días [start, end]; el
+    resto de buckets no se toca.
+    """
+    start_at = datetime.combine(start, time.min) if start else None
+    end_at = datetime.combine(end + timedelta(days=1), time.min) if end else None
+
+    def in_range(column):
+        conditions = [column.isnot(None)]
+        if start_at:
+            conditions.append(column >= start_at)
+        if end_at:
+            conditions.append(column < end_at)
+        return and_(*conditions)
+
+    days = db.execute(
+        select(func.date(Arrival.assigned_at)).where(in_range(Arrival.assigned_at)).distinct()
+    ).scalars().all()
+    for day in days:
+        db.info.setdefault(REPORT_DIRTY_DAYS, set()).add(day)
+
+    for model in (ArrivalStats, DishSalesStats):
+        stmt = delete(model)
+        if start_at:
+            stmt = stmt.where(model.bucket >= start_at)
+        if end_at:
+            stmt = stmt.where(model.bucket < end_at)
+        db.execute(stmt)
+
+    for granularity in StatsGranularity:
+        bucket = _bucket_expr(Arrival.assigned_at, granularity)
+        group_counts = [
+            func.sum(case((Arrival.party_size.between(1, 2), 1), else_=0)),
+            func.sum(case((Arrival.party_size.between(3, 4), 1), else_=0)),
+            func.sum(case((Arrival.party_size.between(5, 6), 1), else_=0)),
+            func.sum(case((Arrival.party_size >= 7, 1), else_=0)),
+        ]
+        db.execute(insert(ArrivalStats).from_select(
+            ["granularity", "bucket", "arrivals", "diners", *GROUP_COLUMNS],
+            select(
+                literal(granularity.name),
+                bucket,
+                func.count(Arrival.id),
+                func.coalesce(func.sum(Arrival.party_size), 0),
+                *group_counts,
+            )
+            .where(in_range(Arrival.assigned_at))
+            .group_by(bucket)
+        ))
+
+        db.execute(insert(DishSalesStats).from_select(
+            ["granularity", "bucket", "dish_id", "units"],
+            select(literal(granularity.name), bucket, OrderDish.dish_id, func.sum(OrderDish.quantity))
+            .select_from(OrderDish)
+            .join(Order, Order.id == OrderDish.order_id)
+            .join(Arrival, Arrival.id == Order.arrival_id)
+            .where(in_range(Arrival.assigned_at))
+            .group_by(bucket, OrderDish.dish_id)
+        ))
+
+    db.commit()
@@ -1,9 +1,20 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.models.table import Table, TableStatus
+from app.utils.pagination import keyset
 
 def get_tables(db: Session):
     return db.query(Table).all()
 
+def list_tables(db: Session, status: Optional[TableStatus] = None, min_capacity: Optional[int] = None,
+                limit: Optional[int] = None, after_id: Optional[int] = None):
+    query = db.query(Table)
+    if status:
+        query = query.filter(Table.status == status)
+    if min_capacity is not None:
+        query = query.filter(Table.capacity >= min_capacity)
+    return keyset(query, Table.id, limit, after_id)
+
 def get_table_by_id(db: Session, table_id: int):
     return db.query(Table).filter(Table.id == table_id).first()
 
@@ -1,7 +1,9 @@
+from typing import Optional
 from sqlalchemy.orm import Session
-from app.models.user import User
+from app.models.user import User, UserRole
 from app.schemas.user import UserCreate
 from app.core.security import get_password_hash
+from app.utils.pagination import keyset
 
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
@@ -12,6 +14,15 @@ def get_user_by_id(db: Session, user_id: int):
 def get_all_users(db: Session):
     return db.query(User).all()
 
+def list_users(db: Session, role: Optional[UserRole] = None, estado: Optional[str] = None,
+               limit: Optional[int] = None, after_id: Optional[int] = None):
+    query = db.query(User)
+    if role:
+        query = query.filter(User.role == role)
+    if estado:
+        query = query.filter(User.estado == estado)
+    return keyset(query, User.id, limit, after_id)
+
 def create_user(db: Session, user: UserCreate):
     db_user = User(
         username=user.username,
@@ -1,39 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError
-from app.core.database import get_db
-from app.schemas import ArrivalCreate, Arrival, TableSchema
-from app.services import arrival_service, table_service
-from app.websocket.manager import manager
+from app.core.database import get_db, get_async_db
+from app.schemas import ArrivalCreate, Arrival
+from app.models.table import TableStatus
+from app.repository.arrival_repo import TableNotFoundError, TableNotAvailableError
+from app.services import arrival_service
+from app.utils.pagination import BoundedPageParams, page_response
+from app.websocket.event_bus import event_bus
 
 router = APIRouter(prefix="/arrivals", tags=["arrivals"])
 
 @router.post("/", response_model=Arrival)
-async def add_arrival(data: ArrivalCreate, db: Session = Depends(get_db)):
+async def add_arrival(data: ArrivalCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         print(f"Received data: {data.dict()}")  # Debug log
         
-        # Verificar si la mesa específica está disponible si se proporciona
-        if hasattr(data, 'table_id') and data.table_id:
-            table = table_service.get_table_by_id(db, data.table_id)
-            if not table:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail={"field": "table_id", "message": "La mesa especificada no existe"}
-                )
-            if table.status != "free":
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail={"field": "table_id", "message": "La mesa especificada no está disponible"}
-                )
-        
-        arrival = arrival_service.create_arrival(db, data)
+        # La mesa se reclama en el repositorio con un UPDATE condicional
+        try:
+            arrival = await arrival_service.create_arrival_async(db, data)
+        except (TableNotFoundError, TableNotAvailableError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"field": "table_id", "message": str(e)}
+            )
         if arrival:
             try:
-                tables = table_service.get_all_tables(db)
-                await manager.broadcast({
-                    "event": "update_tables",
-                    "tables": [TableSchema.from_orm(t).dict() for t in tables]
+                await event_bus.emit("table_changed", {
+                    "table_id": arrival.table_id,
+                    "fields": {"status": TableStatus.occupied},
                 })
             except Exception as websocket_error:
                 print(f"WebSocket error (non-critical): {websocket_error}")
@@ -76,5 +74,15 @@ async def add_arrival(data: ArrivalCreate, db: Session = Depends(get_db)):
         )
 
 @router.get("/", response_model=list[Arrival])
-def list_arrivals(db: Session = Depends(get_db)):
-    return arrival_service.list_arrivals(db)
+def list_arrivals(
+    response: Response,
+    table_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    active: bool = False,
+    page: BoundedPageParams = Depends(),
+    db: Session = Depends(get_db),
+):
+    return page_response(response, arrival_service.list_arrivals(
+        db, table_id=table_id, start=start, end=end, active=active, limit=page.limit, after_id=page.after_id,
+    ))
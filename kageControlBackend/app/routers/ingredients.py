@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services import ingredient_service
+from app.utils.entity_versions import etag_response
+from app.utils.pagination import PageParams, page_response
 from app.schemas import IngredientCreate, Ingredient
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/ingredients", tags=["ingredients"])
 
@@ -16,8 +18,20 @@ def update_ingredient(ingredient_id: int, ingredient: IngredientCreate, db: Sess
     return ingredient_service.update_ingredient(db, ingredient_id, ingredient)
 
 @router.get("/", response_model=List[Ingredient])
-def list_ingredients(db: Session = Depends(get_db)):
-    return ingredient_service.list_ingredients(db)
+def list_ingredients(
+    request: Request,
+    response: Response,
+    name: Optional[str] = None,
+    low_stock: Optional[float] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+):
+    not_modified = etag_response(request, response, "ingredients")
+    if not_modified:
+        return not_modified
+    return page_response(response, ingredient_service.list_ingredients(
+        db, name=name, low_stock=low_stock, limit=page.limit, after_id=page.after_id,
+    ))
 
 @router.delete("/{ingredient_id}")
 def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db)):
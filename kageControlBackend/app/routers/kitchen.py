@@ -1,11 +1,43 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.metrics import kitchen_latency
 from app.services import order_service
+from app.services.kitchen_queue_service import kitchen_queue
 from app.models.order import OrderStatus
+from app.schemas import Order
+from app.websocket.event_bus import event_bus
 
 router = APIRouter(prefix="/kitchen", tags=["kitchen"])
 
-@router.post("/update-status/{order_id}")
-def change_status(order_id: int, new_status: OrderStatus, db: Session = Depends(get_db)):
-    return order_service.update_order_status(db, order_id, new_status)
+@router.post("/update-status/{order_id}", response_model=Order)
+async def change_status(order_id: int, new_status: OrderStatus, db: AsyncSession = Depends(get_async_db)):
+    order = await order_service.update_order_status_async(db, order_id, new_status)
+    if not order:
+        raise HTTPException(status_code=404, detail="Orden no encontrada")
+    await event_bus.emit("order_status_changed", {
+        "order_id": order.id,
+        "arrival_id": order.arrival_id,
+        "station": order.station,
+        "status": new_status.value
+    })
+    return order
+
+@router.get("/queue")
+def list_stations():
+    """Estaciones con órdenes activas y cuántas tiene cada una"""
+    return kitchen_queue.stations()
+
+@router.get("/queue/{station}")
+def get_station_queue(station: str):
+    """Órdenes activas de la estación, de la más urgente a la menos"""
+    return [ticket.as_dict() for ticket in kitchen_queue.station(station)]
+
+@router.get("/latency")
+def get_latency(station: Optional[str] = None):
+    """Histogramas del tiempo entre estados (pending->sent, ..., ready->served y total) por estación"""
+    series = kitchen_latency.snapshot()
+    if station:
+        series = [s for s in series if s["labels"]["station"] == station]
+    return series
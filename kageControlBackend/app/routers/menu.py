@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services import dish_service
-from app.schemas import DishCreate, Dish, DishWithIngredients
+from app.utils.entity_versions import etag_response
+from app.schemas import DishCreate, Dish, DishWithIngredients, AvailableDish
 from typing import List
 
 router = APIRouter(prefix="/menu", tags=["menu"])
 
 @router.get("/", response_model=List[DishWithIngredients])
-def list_all_dishes(db: Session = Depends(get_db)):
+def list_all_dishes(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = etag_response(request, response, "dishes")
+    if not_modified:
+        return not_modified
     return dish_service.get_all_dishes(db)
 
-@router.get("/available", response_model=List[DishWithIngredients])
-def list_available_dishes(db: Session = Depends(get_db)):
+@router.get("/available", response_model=List[AvailableDish])
+def list_available_dishes(request: Request, response: Response, db: Session = Depends(get_db)):
+    # La disponibilidad depende de las recetas y del stock
+    not_modified = etag_response(request, response, "dishes", "ingredients")
+    if not_modified:
+        return not_modified
     return dish_service.get_available_dishes(db)
 
 @router.post("/", response_model=Dish)
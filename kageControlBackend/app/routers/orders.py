@@ -1,35 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-import asyncio
-from app.core.database import get_db
-from app.schemas import Order, OrderCreate, OrderStatus
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db, get_async_db
+from app.schemas import Order, OrderCreate, OrderStatus, OrderStatusHistory
 from app.services import order_service
+from app.utils.pagination import BoundedPageParams, page_response
 from app.websocket.event_bus import event_bus
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+def _order_event(order) -> dict:
+    # Los platillos viajan en el evento para que la cola de cocina no consulte la base
+    return {
+        "order_id": order.id,
+        "arrival_id": order.arrival_id,
+        "station": order.station,
+        "status": order.status.value,
+        "dishes": [{"dish_id": od.dish_id, "quantity": od.quantity} for od in order.dishes],
+        # Misma base que la reconstrucción de la cola, para que todos los workers calculen el mismo vencimiento
+        "fired_at": order.fired_at.isoformat(),
+    }
+
 @router.post("/", response_model=Order)
-async def create_order(data: OrderCreate, db: Session = Depends(get_db)):
+async def create_order(data: OrderCreate, db: AsyncSession = Depends(get_async_db)):
     try:
-        order = order_service.create_order(db, data)
-        asyncio.create_task(event_bus.emit("order_created", {
-            "order_id": order.id,
-            "arrival_id": order.arrival_id
-        }))
-        return order
+        order = await order_service.create_order_async(db, data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    await event_bus.emit("order_created", _order_event(order))
+    return order
+
+@router.post("/batch", response_model=list[Order])
+async def create_orders_batch(data: list[OrderCreate], db: AsyncSession = Depends(get_async_db)):
+    if not data:
+        raise HTTPException(status_code=400, detail="No se enviaron órdenes")
+    try:
+        orders = await order_service.create_orders_async(db, data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Un único evento para toda la mesa en lugar de uno por orden
+    await event_bus.emit("orders_created", {
+        "orders": [_order_event(o) for o in orders]
+    })
+    return orders
+
+def _format_time(assigned_at):
+    return assigned_at.strftime("%H:%M") if assigned_at else "??:??"
 
 @router.get("/tracking", response_model=list[dict])
 def get_orders_for_tracking(db: Session = Depends(get_db)):
-    orders = order_service.get_all_orders(db)
+    orders, dishes = order_service.get_order_summaries(db)
     return [
         {
             "id": o.id,
-            "table": o.arrival.table.name if o.arrival and o.arrival.table else None,
-            "items": [f"{od.quantity}x {od.dish.name}" for od in o.dishes],
+            "table": o.table_name,
+            "items": [f"{quantity}x {name}" for quantity, name in dishes[o.id]],
             "status": o.status.value,
-            "time": o.arrival.assigned_at.strftime("%H:%M") if o.arrival else "??:??",
+            "time": _format_time(o.assigned_at),
         }
         for o in orders
     ]
@@ -37,40 +66,58 @@ def get_orders_for_tracking(db: Session = Depends(get_db)):
 @router.get("/dietary-notes", response_model=list[dict])
 def get_dietary_notes(db: Session = Depends(get_db)):
     """Endpoint específico para obtener todas las órdenes con notas dietéticas"""
-    orders = order_service.get_all_orders(db)
-    
-    dietary_notes = []
-    for order in orders:
-        # Solo incluir órdenes que tengan notas y que no estén servidas
-        if order.notes and order.notes.strip() and order.status != OrderStatus.served:
-            dietary_notes.append({
-                "id": order.id,
-                "table": order.arrival.table.name if order.arrival and order.arrival.table else f"Mesa {order.arrival_id}",
-                "customer_name": order.arrival.customer_name if order.arrival else f"Mesa {order.arrival_id}",
-                "notes": order.notes.strip(),
-                "status": order.status.value,
-                "arrival_id": order.arrival_id,
-                "items": [f"{od.quantity}x {od.dish.name}" for od in order.dishes],
-                "time": order.arrival.assigned_at.strftime("%H:%M") if order.arrival else "??:??"
-            })
-    
-    return dietary_notes
+    # Solo órdenes con notas y que no estén servidas (filtrado en SQL)
+    orders, dishes = order_service.get_order_summaries(db, pending_notes_only=True)
+    return [
+        {
+            "id": o.id,
+            "table": o.table_name or f"Mesa {o.arrival_id}",
+            "customer_name": o.customer_name or f"Mesa {o.arrival_id}",
+            "notes": o.notes.strip(),
+            "status": o.status.value,
+            "arrival_id": o.arrival_id,
+            "items": [f"{quantity}x {name}" for quantity, name in dishes[o.id]],
+            "time": _format_time(o.assigned_at),
+        }
+        for o in orders
+    ]
+
+@router.get("/{order_id}/history", response_model=list[OrderStatusHistory])
+def get_order_history(order_id: int, db: Session = Depends(get_db)):
+    history = order_service.get_status_history(db, order_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Orden no encontrada")
+    return history
 
 @router.get("/{arrival_id}", response_model=list[Order])
 def list_orders(arrival_id: int, db: Session = Depends(get_db)):
     return order_service.get_orders_by_arrival(db, arrival_id)
 
 @router.get("/", response_model=list[Order])
-def list_all_orders(db: Session = Depends(get_db)):
-    return order_service.get_all_orders(db)
+def list_all_orders(
+    response: Response,
+    status: Optional[List[OrderStatus]] = Query(None),
+    station: Optional[str] = None,
+    arrival_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page: BoundedPageParams = Depends(),
+    db: Session = Depends(get_db),
+):
+    return page_response(response, order_service.list_orders(
+        db, status=status, station=station, arrival_id=arrival_id, start=start, end=end,
+        limit=page.limit, after_id=page.after_id,
+    ))
 
 @router.patch("/{order_id}/status", response_model=Order)
-async def change_order_status(order_id: int, status: OrderStatus, db: Session = Depends(get_db)):
-    order = order_service.update_order_status(db, order_id, status)
+async def change_order_status(order_id: int, status: OrderStatus, db: AsyncSession = Depends(get_async_db)):
+    order = await order_service.update_order_status_async(db, order_id, status)
     if not order:
         raise HTTPException(status_code=404, detail="Orden no encontrada")
-    asyncio.create_task(event_bus.emit("order_status_changed", {
+    await event_bus.emit("order_status_changed", {
         "order_id": order.id,
+        "arrival_id": order.arrival_id,
+        "station": order.station,
         "status": status.value
-    }))
+    })
     return order
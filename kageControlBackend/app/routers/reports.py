@@ -1,22 +1,90 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.core.database import get_db
+from app.schemas.report import ReportGranularity, ReportJob, ReportJobCreate, ReportJobStatus
 from app.services import report_service
-from app.utils.pdf_generator_improved import generate_pdf_report
-from fastapi.responses import StreamingResponse
+from app.services.report_job_service import report_jobs, ReportQueueFullError, ReportRenderError
+from app.utils.pdf_generator_improved import report_filename
+from fastapi.responses import Response
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+def _split_sections(sections: List[str]) -> List[str]:
+    # El frontend envía las secciones separadas por comas en un único parámetro
+    return [s.strip() for value in sections for s in value.split(",") if s.strip()]
+
+def _parse_range(start: Optional[str], end: Optional[str]):
+    try:
+        start_date = report_service.parse_report_datetime(start)
+        end_date = report_service.parse_report_datetime(end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido")
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="La fecha de inicio es posterior a la de fin")
+    return start_date, end_date
+
 @router.get("/dashboard")
-def get_dashboard_data(db: Session = Depends(get_db)):
-    return report_service.get_dashboard_data(db)
+def get_dashboard_data(
+    start: Optional[str] = Query(None),
+    end: Optional[str] = Query(None),
+    granularity: ReportGranularity = Query(ReportGranularity.day),
+    db: Session = Depends(get_db)
+):
+    start_date, end_date = _parse_range(start, end)
+    return report_service.get_dashboard_data(db, start_date, end_date, granularity)
 
 @router.get("/pdf")
-def get_pdf_report(
+async def get_pdf_report(
     start: str = Query(...),
     end: str = Query(...),
     sections: List[str] = Query(...),
-    db: Session = Depends(get_db)
-) -> StreamingResponse:
-    return generate_pdf_report(db, start, end, sections)
+    granularity: ReportGranularity = Query(ReportGranularity.day),
+):
+    start_date, end_date = _parse_range(start, end)
+    # Si no está en caché, el render va al pool de reportes como cualquier trabajo:
+    # la petición espera, pero el CPU del PDF no compite con las órdenes
+    try:
+        pdf = await report_jobs.render(start_date, end_date, _split_sections(sections), granularity)
+    except ReportQueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    except ReportRenderError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _pdf_response(pdf, report_filename(start_date, end_date))
+
+def _pdf_response(pdf: bytes, filename: str) -> Response:
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@router.post("/jobs", response_model=ReportJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_report_job(data: ReportJobCreate):
+    start_date, end_date = _parse_range(data.start, data.end)
+    try:
+        return report_jobs.submit(start_date, end_date, _split_sections(data.sections), data.granularity)
+    except ReportQueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+
+@router.get("/jobs/{job_id}", response_model=ReportJob)
+def get_report_job(job_id: str):
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Reporte no encontrado")
+    return job
+
+@router.get("/jobs/{job_id}/file")
+def get_report_job_file(job_id: str):
+    job = report_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Reporte no encontrado")
+    if job["status"] == ReportJobStatus.failed:
+        raise HTTPException(status_code=500, detail=job["error"] or "Error al generar el reporte")
+    if job["status"] != ReportJobStatus.done:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="El reporte aún no está listo")
+    pdf = report_jobs.get_result(job_id)
+    if pdf is None:
+        # Trabajo olvidado por el límite de retención
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="El reporte expiró, vuelve a generarlo")
+    return _pdf_response(pdf, job["filename"])
@@ -1,76 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db, get_async_db
 from app.schemas import TableCreate, TableUpdate, TableSchema, TableResponse
 from app.services import table_service
-from app.websocket.manager import manager
+from app.models.table import TableStatus
+from app.utils.entity_versions import etag_response
+from app.utils.pagination import PageParams, page_response
+from app.websocket.event_bus import event_bus
 
 router = APIRouter(prefix="/tables", tags=["tables"])
 
 @router.get("/")
-def get_all(db: Session = Depends(get_db)):
-    return table_service.get_all_tables(db)
+def get_all(
+    request: Request,
+    response: Response,
+    status: Optional[TableStatus] = None,
+    min_capacity: Optional[int] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+):
+    not_modified = etag_response(request, response, "tables")
+    if not_modified:
+        return not_modified
+    return page_response(response, table_service.list_tables(
+        db, status=status, min_capacity=min_capacity, limit=page.limit, after_id=page.after_id,
+    ))
 
 @router.post("/refresh")
-async def refresh(db: Session = Depends(get_db)):
-    tables = table_service.get_all_tables(db)
-    await manager.broadcast({
-        "event": "update_tables",
-        "tables": [TableSchema.from_orm(t).dict() for t in tables]
-    })
+async def refresh():
+    # Las mesas se leen en cada worker al recibir el evento, junto con la versión del snapshot
+    await event_bus.emit("tables_refreshed", {})
     return {"message": "Actualización enviada por WebSocket"}
 
 @router.put("/{table_id}")
-async def update_table(table_id: int, table_update: TableUpdate, db: Session = Depends(get_db)):
-    mesa = table_service.get_table_by_id(db, table_id)
+async def update_table(table_id: int, table_update: TableUpdate, db: AsyncSession = Depends(get_async_db)):
+    mesa = await table_service.get_table_by_id_async(db, table_id)
     if not mesa:
         raise HTTPException(status_code=404, detail="Mesa no encontrada")
     
     # Usar el nuevo servicio que acepta capacity y status
-    mesa = table_service.update_table(db, table_id, table_update.capacity, table_update.status)
-    mesas = table_service.get_all_tables(db)
-    await manager.broadcast({
-        "event": "update_tables",
-        "tables": [TableSchema.from_orm(t).dict() for t in mesas]
-    })
+    mesa = await table_service.update_table_async(db, table_id, table_update.capacity, table_update.status)
+    cambios = table_update.dict(exclude_none=True)
+    if cambios:
+        await event_bus.emit("table_changed", {"table_id": table_id, "fields": cambios})
     return {"message": "Mesa actualizada", "mesa": TableSchema.from_orm(mesa).dict()}
 
 @router.post("/", response_model=TableResponse, status_code=status.HTTP_201_CREATED)
-async def create_table(table: TableCreate, db: Session = Depends(get_db)):
+async def create_table(table: TableCreate, db: AsyncSession = Depends(get_async_db)):
     # Verificar si ya existe una mesa con ese nombre
-    existing = table_service.get_table_by_name(db, table.name)
+    existing = await table_service.get_table_by_name_async(db, table.name)
     if existing:
         raise HTTPException(status_code=400, detail="La mesa ya existe")
     
-    new_table = table_service.create_table(db, table.name, table.capacity)
-    tables = table_service.get_all_tables(db)
-    await manager.broadcast({
-        "event": "update_tables",
-        "tables": [TableSchema.from_orm(t).dict() for t in tables]
+    new_table = await table_service.create_table_async(db, table.name, table.capacity)
+    await event_bus.emit("table_changed", {
+        "table_id": new_table.id,
+        "fields": {"name": new_table.name, "capacity": new_table.capacity, "status": new_table.status},
     })
     return new_table
 
 @router.delete("/{table_id}")
-async def delete_table(table_id: int, db: Session = Depends(get_db)):
-    mesa = table_service.get_table_by_id(db, table_id)
+async def delete_table(table_id: int, db: AsyncSession = Depends(get_async_db)):
+    mesa = await table_service.get_table_by_id_async(db, table_id)
     if not mesa:
         raise HTTPException(status_code=404, detail="Mesa no encontrada")
     
-    success = table_service.delete_table(db, table_id)
+    success = await table_service.delete_table_async(db, table_id)
     if not success:
         raise HTTPException(status_code=500, detail="Error al eliminar la mesa")
     
-    # Enviar evento específico de eliminación
-    await manager.broadcast({
-        "event": "table_deleted",
-        "table_id": table_id
-    })
-    
-    # También enviar la lista actualizada
-    tables = table_service.get_all_tables(db)
-    await manager.broadcast({
-        "event": "update_tables",
-        "tables": [TableSchema.from_orm(t).dict() for t in tables]
-    })
+    await event_bus.emit("table_deleted", {"table_id": table_id})
     
     return {"message": "Mesa eliminada exitosamente"}
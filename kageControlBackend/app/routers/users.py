@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.models.user import UserRole
 from app.services import user_service
+from app.utils.pagination import PageParams, page_response
 from app.schemas import User, UserUpdate
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/auth/users", tags=["users"])
 
 @router.get("/", response_model=List[User])
-def list_users(db: Session = Depends(get_db)):
-    return user_service.list_users(db)
+def list_users(
+    response: Response,
+    role: Optional[UserRole] = None,
+    estado: Optional[str] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+):
+    return page_response(response, user_service.list_users(
+        db, role=role, estado=estado, limit=page.limit, after_id=page.after_id,
+    ))
 
 @router.get("/{user_id}", response_model=User)
 def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
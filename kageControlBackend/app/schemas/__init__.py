@@ -5,3 +5,4 @@ from .arrival import *
 from .order import *
 from .dish import *
 from .ingredient import *
+from .report import *
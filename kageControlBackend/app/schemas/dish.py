@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import List
+from typing import List, Optional
 from app.schemas.ingredient import DishIngredientCreate, DishIngredientResponse
 
 class DishBase(BaseModel):
@@ -21,6 +21,9 @@ class DishWithIngredients(DishBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class AvailableDish(DishWithIngredients):
+    portions_available: Optional[int] = None
+
 class DishSchema(BaseModel):
     id: int
     name: str
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, ConfigDict
+from datetime import datetime
 from typing import List, Optional
 from app.schemas.dish import DishSchema
 from app.models.order import OrderStatus
@@ -24,3 +25,11 @@ class Order(OrderBase):
     status: OrderStatus
 
     model_config = ConfigDict(from_attributes=True)
+
+class OrderStatusHistory(BaseModel):
+    from_status: Optional[OrderStatus]
+    to_status: OrderStatus
+    station: Optional[str]
+    changed_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,31 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+import enum
+
+class ReportGranularity(str, enum.Enum):
+    hour = "hour"
+    day = "day"
+    week = "week"
+    month = "month"
+
+class ReportJobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+class ReportJobCreate(BaseModel):
+    start: str
+    end: str
+    sections: List[str]
+    granularity: ReportGranularity = ReportGranularity.day
+
+class ReportJob(BaseModel):
+    id: str
+    status: ReportJobStatus
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,9 +1,14 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.repository import arrival_repo, table_repo
+from app.repository.aio import arrival_repo as aio_arrival_repo
 from app.schemas.arrival import ArrivalCreate
 
 def create_arrival(db: Session, data: ArrivalCreate):
     return arrival_repo.create_arrival(db, data)
 
-def list_arrivals(db: Session):
-    return arrival_repo.get_all_arrivals(db)
+def list_arrivals(db: Session, **filters):
+    return arrival_repo.list_arrivals(db, **filters)
+
+async def create_arrival_async(db: AsyncSession, data: ArrivalCreate):
+    return await aio_arrival_repo.create_arrival(db, data)
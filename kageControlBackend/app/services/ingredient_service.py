@@ -26,8 +26,8 @@ def update_ingredient(db: Session, ingredient_id: int, ingredient: IngredientCre
     db.refresh(existing)
     return existing
 
-def list_ingredients(db: Session):
-    return ingredient_repo.get_all_ingredients(db)
+def list_ingredients(db: Session, **filters):
+    return ingredient_repo.list_ingredients(db, **filters)
 
 def delete_ingredient(db: Session, ingredient_id: int):
     return ingredient_repo.delete_ingredient(db, ingredient_id)
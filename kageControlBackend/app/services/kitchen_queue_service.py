@@ -0,0 +1,142 @@
+import bisect
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.order import OrderStatus
+from app.repository.aio import order_repo as aio_order_repo
+
+def parse_station_sla(value: str) -> Dict[str, int]:
+    """"parrilla:20,postres:8" -> {"parrilla": 20, "postres": 8} (minutos)"""
+    sla = {}
+    for part in value.split(","):
+        station, _, minutes = part.partition(":")
+        if station.strip() and minutes.strip().isdigit():
+            sla[station.strip()] = int(minutes)
+    return sla
+
+class KitchenTicket:
+    def __init__(self, order_id: int, arrival_id: Optional[int], station: str, status: OrderStatus,
+                 fired_at: datetime, deadline: datetime, dishes: List[dict]):
+        self.order_id = order_id
+        self.arrival_id = arrival_id
+        self.station = station
+        self.status = status
+        self.fired_at = fired_at
+        self.deadline = deadline
+        self.dishes = dishes
+
+    def as_dict(self) -> dict:
+        return {
+            "order_id": self.order_id,
+            "arrival_id": self.arrival_id,
+            "station": self.station,
+            "status": self.status.value,
+            "fired_at": self.fired_at.isoformat(),
+            "deadline": self.deadline.isoformat(),
+            "dishes": self.dishes,
+        }
+
+class StationQueue:
+    """Tickets de una estación en una lista ordenada por (vencimiento, hora de envío, orden).
+
+    El vencimiento no cambia con el estado, así que la lista solo se toca al
+    agregar o retirar un ticket (búsqueda binaria) y leerla no reordena nada.
+    """
+
+    def __init__(self):
+        self._keys: List[tuple] = []
+        self._tickets: Dict[int, KitchenTicket] = {}
+
+    def __len__(self):
+        return len(self._tickets)
+
+    @staticmethod
+    def _key(ticket: KitchenTicket) -> tuple:
+        return (ticket.deadline, ticket.fired_at, ticket.order_id)
+
+    def push(self, ticket: KitchenTicket):
+        self.remove(ticket.order_id)
+        self._tickets[ticket.order_id] = ticket
+        bisect.insort(self._keys, self._key(ticket))
+
+    def get(self, order_id: int) -> Optional[KitchenTicket]:
+        return self._tickets.get(order_id)
+
+    def remove(self, order_id: int) -> Optional[KitchenTicket]:
+        ticket = self._tickets.pop(order_id, None)
+        if ticket:
+            key = self._key(ticket)
+            position = bisect.bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                self._keys.pop(position)
+        return ticket
+
+    def ordered(self) -> List[KitchenTicket]:
+        return [self._tickets[key[2]] for key in self._keys]
+
+class KitchenQueue:
+    """Cola en memoria de órdenes activas (no servidas) por estación.
+
+    Se alimenta de los eventos de órdenes del bus y se reconstruye desde la
+    base al arrancar. El vencimiento de cada ticket es su hora de envío más
+    el SLA de la estación.
+    """
+
+    def __init__(self, default_sla_minutes: int, station_sla: Dict[str, int]):
+        self.default_sla_minutes = default_sla_minutes
+        self.station_sla = station_sla
+        self._stations: Dict[str, StationQueue] = {}
+
+    def _deadline(self, station: str, fired_at: datetime) -> datetime:
+        return fired_at + timedelta(minutes=self.station_sla.get(station, self.default_sla_minutes))
+
+    def add(self, order_id: int, arrival_id: Optional[int], station: str, status: OrderStatus,
+            dishes: List[dict], fired_at: Optional[datetime] = None) -> Optional[KitchenTicket]:
+        status = OrderStatus(status)
+        if status == OrderStatus.served:
+            return None
+        fired_at = fired_at or datetime.utcnow()
+        ticket = KitchenTicket(order_id, arrival_id, station, status, fired_at,
+                               self._deadline(station, fired_at), dishes)
+        self._stations.setdefault(station, StationQueue()).push(ticket)
+        return ticket
+
+    def update_status(self, order_id: int, station: str, status: OrderStatus) -> Optional[KitchenTicket]:
+        """Actualizar el estado de un ticket; devuelve el ticket (retirado si quedó servido)"""
+        queue = self._stations.get(station)
+        if queue is None:
+            return None
+        status = OrderStatus(status)
+        if status == OrderStatus.served:
+            ticket = queue.remove(order_id)
+            if ticket:
+                ticket.status = status
+            return ticket
+        ticket = queue.get(order_id)
+        if ticket:
+            ticket.status = status
+        return ticket
+
+    def station(self, station: str) -> List[KitchenTicket]:
+        queue = self._stations.get(station)
+        return queue.ordered() if queue else []
+
+    def stations(self) -> Dict[str, int]:
+        return {name: len(queue) for name, queue in self._stations.items()}
+
+    async def rebuild(self, db: AsyncSession):
+        orders, dishes = await aio_order_repo.get_active_orders(db)
+        self._stations = {}
+        for order in orders:
+            self.add(
+                order.id, order.arrival_id, order.station, order.status,
+                dishes.get(order.id, []), fired_at=order.fired_at,
+            )
+        print(f"🍳 Cola de cocina reconstruida: {len(orders)} órdenes activas.")
+
+# Instancia global
+kitchen_queue = KitchenQueue(
+    default_sla_minutes=settings.KITCHEN_SLA_MINUTES,
+    station_sla=parse_station_sla(settings.KITCHEN_STATION_SLA),
+)
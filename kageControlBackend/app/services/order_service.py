@@ -1,16 +1,40 @@
+from typing import List
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.repository import order_repo
+from app.repository.aio import order_repo as aio_order_repo
 from app.schemas.order import OrderCreate
 from app.models.order import OrderStatus
 
 def create_order(db: Session, data: OrderCreate):
     return order_repo.create_order(db, data)
 
+def create_orders(db: Session, items: List[OrderCreate]):
+    return order_repo.create_orders(db, items)
+
 def get_orders_by_arrival(db: Session, arrival_id: int):
     return order_repo.get_orders_by_arrival(db, arrival_id)
 
 def get_all_orders(db: Session):
     return order_repo.get_all_orders(db)
 
+def get_order_summaries(db: Session, pending_notes_only: bool = False):
+    return order_repo.get_order_summaries(db, pending_notes_only)
+
+def list_orders(db: Session, **filters):
+    return order_repo.list_orders(db, **filters)
+
 def update_order_status(db: Session, order_id: int, status: OrderStatus):
     return order_repo.update_order_status(db, order_id, status)
+
+def get_status_history(db: Session, order_id: int):
+    return order_repo.get_status_history(db, order_id)
+
+async def create_order_async(db: AsyncSession, data: OrderCreate):
+    return await aio_order_repo.create_order(db, data)
+
+async def create_orders_async(db: AsyncSession, items: List[OrderCreate]):
+    return await aio_order_repo.create_orders(db, items)
+
+async def update_order_status_async(db: AsyncSession, order_id: int, status: OrderStatus):
+    return await aio_order_repo.update_order_status(db, order_id, status)
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.schemas.report import ReportGranularity, ReportJobStatus
+from app.services import report_service
+from app.utils.pdf_generator_improved import render_pdf_report, report_filename
+from app.utils.report_cache import report_cache, pid_alive
+
+class ReportQueueFullError(Exception):
+    pass
+
+class ReportRenderError(Exception):
+    pass
+
+JOB_ID = re.compile(r"[0-9a-f]{32}")
+FINISHED = (ReportJobStatus.done.value, ReportJobStatus.failed.value)
+
+class ReportJob:
+    def __init__(self, start: datetime, end: datetime, sections: List[str], granularity: ReportGranularity):
+        self.id = uuid.uuid4().hex
+        self.start = start
+        self.end = end
+        self.sections = sections
+        self.granularity = granularity
+        self.status = ReportJobStatus.queued
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.stored = True
+        self.task: Optional[asyncio.Task] = None
+        self.version = report_cache.data_version(start, end)
+        self.cache_key = report_cache.make_key(start, end, granularity.value, sections, self.version)
+
+    @property
+    def filename(self) -> str:
+        return report_filename(self.start, self.end)
+
+def _write_atomic(path: Path, content: bytes):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+class ReportJobStore:
+    """Estado y PDF de cada trabajo en un directorio compartido por todos los workers.
+
+    Así cualquier worker puede responder GET /reports/jobs/{id}, no solo el que
+    lo encoló. Un trabajo sin terminar cuyo proceso ya no existe se informa
+    como fallido.
+    """
+
+    def __init__(self, directory: str, retention: int):
+        self.directory = Path(directory)
+        self.retention = retention
+
+    def _record_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def _result_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.pdf"
+
+    def save(self, job: "ReportJob"):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self._record_path(job.id), json.dumps({
+            "id": job.id,
+            "status": job.status.value,
+            "created_at": job.created_at.isoformat(),
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "error": job.error,
+            "filename": job.filename,
+            "pid": os.getpid(),
+        }).encode())
+
+    def save_result(self, job_id: str, pdf: bytes):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self._result_path(job_id), pdf)
+
+    def load(self, job_id: str, local_ids=()) -> Optional[dict]:
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            record = json.loads(self._record_path(job_id).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if record["status"] not in FINISHED:
+            # Encolado por este proceso pero ya no activo, o por un proceso que terminó
+            owner = record.get("pid")
+            if (owner == os.getpid() and job_id not in local_ids) or not pid_alive(owner):
+                record["status"] = ReportJobStatus.failed.value
+                record["error"] = "El servidor se reinició mientras se generaba el reporte"
+        return record
+
+    def load_result(self, job_id: str) -> Optional[bytes]:
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            return self._result_path(job_id).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def prune(self):
+        """Borrar los trabajos terminados más antiguos por encima del límite de retención"""
+        finished = []
+        for path in self.directory.glob("*.json"):
+            try:
+                record = json.loads(path.read_text())
+                mtime = path.stat().st_mtime
+            except (FileNotFoundError, ValueError):
+                continue
+            if record.get("status") in FINISHED:
+                finished.append((mtime, record["id"]))
+        finished.sort()
+        for _, job_id in finished[:max(0, len(finished) - self.retention)]:
+            for path in (self._record_path(job_id), self._result_path(job_id)):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+def _lower_priority():
+    # Los procesos de render ceden CPU a los workers que atienden órdenes
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+class ReportJobManager:
+    """Cola acotada de reportes PDF renderizados en un pool de procesos.
+
+    Las consultas (ligeras, sobre agregados) se hacen en un hilo; el render de
+    reportlab, que es CPU puro, va al pool para no retener el GIL del worker.
+    El estado de los trabajos vive en el ReportJobStore compartido.
+    """
+
+    def __init__(self, max_workers: int, queue_depth: int, store: ReportJobStore):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.store = store
+        self._active: Dict[str, ReportJob] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks = set()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_lower_priority,
+            )
+        return self._pool
+
+    def pending(self) -> int:
+        return len(self._active)
+
+    def submit(self, start: datetime, end: datetime, sections: List[str], granularity: ReportGranularity,
+               stored: bool = True) -> ReportJob:
+        """Encolar un reporte; con `stored` su estado y PDF quedan en el directorio compartido"""
+        if self.pending() >= self.queue_depth:
+            raise ReportQueueFullError("La cola de reportes está llena, intenta más tarde")
+        job = ReportJob(start, end, sections, granularity)
+        job.stored = stored
+        self._active[job.id] = job
+        if stored:
+            self.store.save(job)
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks.add(job.task)
+        job.task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def render(self, start: datetime, end: datetime, sections: List[str],
+                     granularity: ReportGranularity) -> bytes:
+        """Bytes de un reporte para la descarga directa de /reports/pdf: de la caché
+        si está, si no se encola en el pool y se espera"""
+        loop = asyncio.get_running_loop()
+        version = report_cache.data_version(start, end)
+        key = report_cache.make_key(start, end, granularity.value, sections, version)
+        # Si el archivo desapareció de la caché se renderiza de nuevo
+        cached = await loop.run_in_executor(None, report_cache.read, key)
+        if cached is not None:
+            return cached
+        job = self.submit(start, end, sections, granularity, stored=False)
+        # shield: si el cliente se desconecta, el render termina igual y queda en caché
+        pdf = await asyncio.shield(job.task)
+        if pdf is None:
+            raise ReportRenderError(job.error or "Error al generar el reporte")
+        return pdf
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.store.load(job_id, self._active)
+
+    def get_result(self, job_id: str) -> Optional[bytes]:
+        return self.store.load_result(job_id)
+
+    async def _run(self, job: ReportJob) -> Optional[bytes]:
+        loop = asyncio.get_running_loop()
+        try:
+            # Si el mismo reporte ya está renderizado con los datos actuales, no se renderiza
+            pdf = await loop.run_in_executor(None, report_cache.read, job.cache_key)
+            if pdf is None:
+                data = await loop.run_in_executor(None, self._load_data, job)
+                job.status = ReportJobStatus.running
+                if job.stored:
+                    self.store.save(job)
+                pdf = await loop.run_in_executor(
+                    self._get_pool(), render_pdf_report, data, job.start, job.end, job.sections
+                )
+                # Devuelve None si los datos cambiaron durante el render: se entrega igual, sin cachear
+                await loop.run_in_executor(
+                    None, report_cache.put, job.cache_key, pdf, job.start, job.end, job.version
+                )
+            if job.stored:
+                await loop.run_in_executor(None, self.store.save_result, job.id, pdf)
+            job.status = ReportJobStatus.done
+            return pdf
+        except Exception as e:
+            print(f"❌ Error generando reporte {job.id}: {e}")
+            job.status = ReportJobStatus.failed
+            job.error = str(e)
+            return None
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._active.pop(job.id, None)
+            if job.stored:
+                self.store.save(job)
+                await loop.run_in_executor(None, self.store.prune)
+
+    def _load_data(self, job: ReportJob) -> dict:
+        db = SessionLocal()
+        try:
+            return report_service.get_dashboard_data(db, job.start, job.end, job.granularity)
+        finally:
+            db.close()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+# Instancia global
+report_jobs = ReportJobManager(
+    max_workers=settings.REPORT_WORKERS,
+    queue_depth=settings.REPORT_QUEUE_DEPTH,
+    store=ReportJobStore(os.path.join(settings.REPORT_CACHE_DIR, "jobs"), settings.REPORT_JOB_RETENTION),
+)
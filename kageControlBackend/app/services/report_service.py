@@ -1,77 +1,150 @@
 from sqlalchemy.orm import Session
 from collections import defaultdict
-from app.models import Arrival, Order, Table
-from statistics import mean
-from datetime import datetime, timedelta
-from sqlalchemy import func
-
-def get_dashboard_data(db: Session):
-    """Obtener datos completos del dashboard con análisis mejorado"""
-    
-    # Obtener todas las llegadas
-    all_arrivals = db.query(Arrival).all()
+from typing import Optional
+from app.models import Table, Dish, ArrivalStats, DishSalesStats, StatsGranularity
+from app.repository import stats_repo
+from app.schemas.report import ReportGranularity
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, select, case
+
+GROUP_LABELS = {
+    "groups_1_2": "1-2 personas",
+    "groups_3_4": "3-4 personas",
+    "groups_5_6": "5-6 personas",
+    "groups_7_plus": "7+ personas",
+}
+
+def parse_report_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Interpretar fechas ISO del frontend (con o sin hora y zona) como datetime local"""
+    if not value:
+        return None
+    value = value.strip().replace("Z", "")
+    parsed = datetime.fromisoformat(value.replace("T", " ").split("+")[0])
+    return parsed.replace(tzinfo=None)
+
+def _bucket_key(bucket: datetime, granularity: ReportGranularity) -> str:
+    """Clave ISO del inicio del bucket, ordenable como texto"""
+    if granularity == ReportGranularity.hour:
+        return bucket.isoformat(timespec="minutes")
+    day = bucket.date()
+    if granularity == ReportGranularity.week:
+        day -= timedelta(days=day.weekday())
+    elif granularity == ReportGranularity.month:
+        day = day.replace(day=1)
+    return day.isoformat()
+
+def _in_range(model, source: StatsGranularity, start: Optional[datetime], end: Optional[datetime]):
+    """Predicados sobre la clave primaria (granularity, bucket) del agregado"""
+    conditions = [model.granularity == source]
+    if start:
+        conditions.append(model.bucket >= stats_repo.bucket_start(start, source))
+    if end:
+        conditions.append(model.bucket <= end)
+    return conditions
+
+def get_dashboard_data(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: ReportGranularity = ReportGranularity.day
+):
+    """Obtener datos del dashboard para un rango de fechas a partir de los agregados.
+
+    Las granularidades hora usan el agregado horario; día, semana y mes se
+    acumulan sobre el agregado diario.
+    """
+    source = StatsGranularity.hour if granularity == ReportGranularity.hour else StatsGranularity.day
+
+    # Reservas, comensales y grupos por bucket (tabla de agregados)
+    filas = db.execute(
+        select(ArrivalStats)
+        .where(*_in_range(ArrivalStats, source, start, end))
+        .order_by(ArrivalStats.bucket)
+    ).scalars().all()
+
     reservas_por_dia = defaultdict(int)
-    
-    # Obtener estado actual de las mesas
-    tables = db.query(Table).all()
-    estados = {"free": 0, "reserved": 0, "occupied": 0, "cleaning": 0}
-    for table in tables:
-        if hasattr(table.status, 'value'):
-            estados[table.status.value] += 1
-        else:
-            estados[str(table.status)] += 1
-    
-    # Procesar reservas por día
-    for arrival in all_arrivals:
-        if arrival.assigned_at:
-            fecha = arrival.assigned_at.date().isoformat()
-            reservas_por_dia[fecha] += 1
-
-    # Obtener órdenes y análisis de platos
-    orders = db.query(Order).all()
-    platos_count = defaultdict(int)
-    total_revenue = 0
-    
-    for order in orders:
-        for dish_order in order.dishes:
-            platos_count[dish_order.dish.name] += dish_order.quantity
-            # Si hay precio, calcularlo (asumiendo que existe un campo price)
-            # total_revenue += dish_order.quantity * getattr(dish_order.dish, 'price', 0)
-
-    # Top 15 platos más populares
-    top_platos = sorted(platos_count.items(), key=lambda x: x[1], reverse=True)[:15]
-    
-    # Análisis de comensales
     total_por_fecha = defaultdict(int)
-    tamanio_grupos = [arrival.party_size for arrival in all_arrivals if arrival.party_size]
-    
-    for arrival in all_arrivals:
-        if arrival.assigned_at and arrival.party_size:
-            fecha = arrival.assigned_at.date().isoformat()
-            total_por_fecha[fecha] += arrival.party_size
+    distribucion = dict.fromkeys(GROUP_LABELS, 0)
+    for fila in filas:
+        if not fila.arrivals:
+            continue
+        fecha = _bucket_key(fila.bucket, granularity)
+        reservas_por_dia[fecha] += fila.arrivals
+        if fila.diners:
+            total_por_fecha[fecha] += fila.diners
+        for column in GROUP_LABELS:
+            distribucion[column] += getattr(fila, column)
+
+    reservas_por_dia = dict(reservas_por_dia)
+    total_por_fecha = dict(total_por_fecha)
+    distribucion_grupos = {
+        GROUP_LABELS[column]: total for column, total in distribucion.items() if total
+    }
+    grupos_totales = sum(distribucion.values())
+
+    # Estado actual de las mesas
+    estados = {"free": 0, "reserved": 0, "occupied": 0, "cleaning": 0}
+    for table_status, total in db.execute(
+        select(Table.status, func.count(Table.id)).group_by(Table.status)
+    ).all():
+        key = table_status.value if hasattr(table_status, 'value') else str(table_status)
+        estados[key] = total
+
+    # Platos más vendidos en el rango
+    unidades = func.sum(DishSalesStats.units)
+    top_platos = db.execute(
+        select(Dish.name, unidades.label("cantidad"))
+        .join(DishSalesStats, DishSalesStats.dish_id == Dish.id)
+        .where(*_in_range(DishSalesStats, source, start, end))
+        .group_by(Dish.id, Dish.name)
+        .having(unidades > 0)
+        .order_by(unidades.desc())
+        .limit(15)
+    ).all()
+    platos_totales = db.execute(
+        select(
+            func.count(func.distinct(DishSalesStats.dish_id)).label("diferentes"),
+            func.coalesce(func.sum(DishSalesStats.units), 0).label("unidades"),
+        )
+        .where(*_in_range(DishSalesStats, source, start, end), DishSalesStats.units > 0)
+    ).one()
 
     # Calcular métricas adicionales
-    promedio_grupo = mean(tamanio_grupos) if tamanio_grupos else 0
     total_comensales = sum(total_por_fecha.values())
     total_reservas = sum(reservas_por_dia.values())
-    
-    # Análisis de tendencias (últimos 7 días vs anteriores 7 días)
-    today = datetime.now().date()
-    last_week = today - timedelta(days=7)
-    prev_week = today - timedelta(days=14)
-    
-    reservas_ultima_semana = sum(1 for a in all_arrivals 
-                                if a.assigned_at and a.assigned_at.date() >= last_week)
-    reservas_semana_anterior = sum(1 for a in all_arrivals 
-                                  if a.assigned_at and prev_week <= a.assigned_at.date() < last_week)
-    
+    promedio_grupo = total_comensales / grupos_totales if grupos_totales else 0
+
+    # Análisis de tendencias (últimos 7 días vs anteriores 7 días, respecto al fin del rango)
+    reference = end.date() if end else datetime.now().date()
+    last_week = datetime.combine(reference - timedelta(days=7), time.min)
+    prev_week = datetime.combine(reference - timedelta(days=14), time.min)
+    until = datetime.combine(reference, time.min)
+
+    tendencia = db.execute(
+        select(
+            func.coalesce(func.sum(case(
+                (ArrivalStats.bucket >= last_week, ArrivalStats.arrivals), else_=0
+            )), 0).label("ultima"),
+            func.coalesce(func.sum(case(
+                (ArrivalStats.bucket < last_week, ArrivalStats.arrivals), else_=0
+            )), 0).label("anterior"),
+        )
+        .where(
+            ArrivalStats.granularity == StatsGranularity.day,
+            ArrivalStats.bucket >= prev_week,
+            ArrivalStats.bucket <= until,
+        )
+    ).one()
+    reservas_ultima_semana = int(tendencia.ultima)
+    reservas_semana_anterior = int(tendencia.anterior)
+
     # Calcular duración promedio de reservas (simulado - se podría mejorar con datos reales)
     duracion_promedio = 90  # minutos, valor por defecto
-    
+
     return {
         "reservas": {
             "duracion_promedio": duracion_promedio,
-            "por_dia": dict(reservas_por_dia),
+            "por_dia": reservas_por_dia,
             "por_estado": estados,
             "total": total_reservas,
             "tendencia": {
@@ -82,23 +155,23 @@ def get_dashboard_data(db: Session):
             }
         },
         "ordenes": {
-            "top_platos": [{"nombre": k, "cantidad": v} for k, v in top_platos],
-            "total_platos_diferentes": len(platos_count),
-            "total_unidades_vendidas": sum(platos_count.values()),
-            # "revenue_total": total_revenue
+            "top_platos": [{"nombre": nombre, "cantidad": int(cantidad)} for nombre, cantidad in top_platos],
+            "total_platos_diferentes": platos_totales.diferentes,
+            "total_unidades_vendidas": int(platos_totales.unidades),
         },
         "comensales": {
             "tamano_promedio": promedio_grupo,
-            "por_dia": dict(total_por_fecha),
+            "por_dia": total_por_fecha,
             "total": total_comensales,
-            "grupos_totales": len(tamanio_grupos),
-            "distribucion_grupos": _get_group_size_distribution(tamanio_grupos)
+            "grupos_totales": grupos_totales,
+            "distribucion_grupos": distribucion_grupos
         },
         "metricas_generales": {
             "periodo_analisis": {
                 "inicio": min(reservas_por_dia.keys()) if reservas_por_dia else None,
                 "fin": max(reservas_por_dia.keys()) if reservas_por_dia else None,
-                "dias_activos": len(reservas_por_dia)
+                "dias_activos": len(reservas_por_dia),
+                "granularidad": granularity.value
             },
             "promedios": {
                 "reservas_por_dia": total_reservas / len(reservas_por_dia) if reservas_por_dia else 0,
@@ -107,21 +180,3 @@ def get_dashboard_data(db: Session):
             }
         }
     }
-
-def _get_group_size_distribution(group_sizes):
-    """Obtener distribución del tamaño de grupos"""
-    if not group_sizes:
-        return {}
-    
-    distribution = defaultdict(int)
-    for size in group_sizes:
-        if size <= 2:
-            distribution["1-2 personas"] += 1
-        elif size <= 4:
-            distribution["3-4 personas"] += 1
-        elif size <= 6:
-            distribution["5-6 personas"] += 1
-        else:
-            distribution["7+ personas"] += 1
-    
-    return dict(distribution)
@@ -1,10 +1,15 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.repository import table_repo
+from app.repository.aio import table_repo as aio_table_repo
 from app.models.table import TableStatus
 
 def get_all_tables(db: Session):
     return table_repo.get_tables(db)
 
+def list_tables(db: Session, **filters):
+    return table_repo.list_tables(db, **filters)
+
 def create_table(db: Session, name: str, capacity: int):
     return table_repo.create_table(db, name, capacity)
 
@@ -22,3 +27,21 @@ def get_table_by_name(db: Session, name: str):
 
 def delete_table(db: Session, table_id: int):
     return table_repo.delete_table(db, table_id)
+
+async def get_all_tables_async(db: AsyncSession):
+    return await aio_table_repo.get_tables(db)
+
+async def create_table_async(db: AsyncSession, name: str, capacity: int):
+    return await aio_table_repo.create_table(db, name, capacity)
+
+async def update_table_async(db: AsyncSession, table_id: int, capacity: int = None, status: TableStatus = None):
+    return await aio_table_repo.update_table(db, table_id, capacity, status)
+
+async def get_table_by_id_async(db: AsyncSession, table_id: int):
+    return await aio_table_repo.get_table_by_id(db, table_id)
+
+async def get_table_by_name_async(db: AsyncSession, name: str):
+    return await aio_table_repo.get_table_by_name(db, name)
+
+async def delete_table_async(db: AsyncSession, table_id: int):
+    return await aio_table_repo.delete_table(db, table_id)
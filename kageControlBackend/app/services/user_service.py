@@ -13,8 +13,8 @@ def login_user(db: Session, username: str, password: str, verify_fn):
         return None
     return user
 
-def list_users(db: Session):
-    return user_repo.get_all_users(db)
+def list_users(db: Session, **filters):
+    return user_repo.list_users(db, **filters)
 
 def get_user(db: Session, user_id: int):
     return user_repo.get_user_by_id(db, user_id)
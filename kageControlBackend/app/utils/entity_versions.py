@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import uuid
+from typing import Iterable, Optional
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.models.dish import Dish
+from app.models.ingredient import DishIngredient, Ingredient
+from app.models.table import Table
+from app.websocket.event_bus import event_bus
+
+# Clave en Session.info con los tipos de entidad modificados en la transacción
+ENTITY_CHANGES = "entity_changes"
+
+# Tipo de entidad de cada modelo cuyas lecturas se cachean con ETag
+MODEL_ENTITIES = {
+    Table: "tables",
+    Dish: "dishes",
+    DishIngredient: "dishes",
+    Ingredient: "ingredients",
+}
+
+class EntityVersions:
+    """Contadores de versión por tipo de entidad, base de los ETags.
+
+    Cada commit que modifica un tipo incrementa su contador. El prefijo
+    `origin` es único por proceso, así un ETag emitido por otro worker nunca
+    coincide por accidente; los cambios hechos en otros workers llegan por el
+    bus de eventos e incrementan los contadores locales.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex[:12]
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Loop donde publicar los cambios en el bus (los commits pueden ocurrir en otros hilos)"""
+        self._loop = loop
+
+    def etag(self, *entities: str) -> str:
+        with self._lock:
+            parts = [f"{entity}{self._versions.get(entity, 0)}" for entity in entities]
+        return f'"{self.origin}-{"-".join(parts)}"'
+
+    def bump(self, entities: Iterable[str]):
+        with self._lock:
+            for entity in entities:
+                self._versions[entity] = self._versions.get(entity, 0) + 1
+
+    def publish(self, entities: Iterable[str]):
+        if self._loop is None or self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(
+            event_bus.emit("entities_changed", {"origin": self.origin, "entities": sorted(entities)}),
+            self._loop,
+        )
+
+# Instancia global
+entity_versions = EntityVersions()
+
+def mark_changed(db: Session, *entities: str):
+    """Registrar que la transacción modifica estos tipos (para escrituras que no pasan por el ORM)"""
+    db.info.setdefault(ENTITY_CHANGES, set()).update(entities)
+
+def etag_response(request: Request, response: Response, *entities: str) -> Optional[Response]:
+    """Devuelve un 304 si el cliente ya tiene la versión actual; si no, agrega el ETag a la respuesta"""
+    etag = entity_versions.etag(*entities)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session):
+    entities = session.info.pop(ENTITY_CHANGES, None)
+    if entities:
+        entity_versions.bump(entities)
+        entity_versions.publish(entities)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(ENTITY_CHANGES, None)
+
+def _mark_model_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_changed(session, MODEL_ENTITIES[type(target)])
+
+for _model in MODEL_ENTITIES:
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _mark_model_change)
@@ -0,0 +1,63 @@
+import base64
+import binascii
+import json
+from typing import Optional
+from fastapi import HTTPException, Query, Response
+
+MAX_PAGE_SIZE = 500
+# Tamaño de página por defecto de los listados que crecen sin límite (órdenes, llegadas)
+DEFAULT_PAGE_SIZE = 100
+
+# El cuerpo de los listados sigue siendo una lista; el cursor de la siguiente página va en este header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode()
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+class PageParams:
+    """Parámetros de paginación por cursor (keyset) sobre la clave primaria.
+
+    Sin `limit` se devuelve el listado completo, como antes.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de página"),
+        cursor: Optional[str] = Query(None, description=f"Valor de {NEXT_CURSOR_HEADER} de la página anterior"),
+    ):
+        self.limit = limit
+        self.after_id = decode_cursor(cursor) if cursor else None
+
+class BoundedPageParams(PageParams):
+    """Como PageParams, pero sin `limit` se devuelve una página de DEFAULT_PAGE_SIZE"""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de página"),
+        cursor: Optional[str] = Query(None, description=f"Valor de {NEXT_CURSOR_HEADER} de la página anterior"),
+    ):
+        super().__init__(limit, cursor)
+
+def keyset(query, id_column, limit: Optional[int] = None, after_id: Optional[int] = None):
+    """Aplicar la página a una consulta ordenada por id; devuelve (filas, último id o None)"""
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    query = query.order_by(id_column)
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+def page_response(response: Response, page):
+    items, last_id = page
+    if last_id is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last_id)
+    return items
@@ -1,5 +1,4 @@
 from io import BytesIO
-from fastapi.responses import StreamingResponse
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, 
@@ -17,8 +16,6 @@ from reportlab.graphics.charts.legends import Legend
 from reportlab.graphics import renderPDF
 from typing import List
 from datetime import datetime
-from sqlalchemy.orm import Session
-from app.services import report_service
 
 class KageReportGenerator:
     def __init__(self):
@@ -110,6 +107,15 @@ class KageReportGenerator:
         
         return styles
     
+    def _format_bucket(self, fecha, data):
+        """Formatear la clave de un bucket según la granularidad del reporte"""
+        granularidad = data['metricas_generales']['periodo_analisis'].get('granularidad', 'day')
+        formato = {
+            'hour': '%d/%m/%Y %H:%M',
+            'month': '%m/%Y',
+        }.get(granularidad, '%d/%m/%Y')
+        return datetime.fromisoformat(fecha).strftime(formato)
+    
     def _create_header(self, elements):
         """Crear encabezado del reporte"""
         # Logo placeholder (se puede reemplazar con logo real)
@@ -214,7 +220,7 @@ class KageReportGenerator:
             tabla_datos = [['Fecha', 'Cantidad de Reservas', 'Porcentaje del Total']]
             for fecha, cantidad in sorted(reservas_data['por_dia'].items()):
                 porcentaje = (cantidad / total_reservas * 100) if total_reservas > 0 else 0
-                fecha_formateada = datetime.fromisoformat(fecha).strftime('%d/%m/%Y')
+                fecha_formateada = self._format_bucket(fecha, data)
                 tabla_datos.append([fecha_formateada, str(cantidad), f"{porcentaje:.1f}%"])
             
             tabla_reservas = Table(tabla_datos, colWidths=[2*inch, 2*inch, 2*inch])
@@ -381,7 +387,7 @@ class KageReportGenerator:
             for fecha, cantidad in sorted(comensales_data['por_dia'].items()):
                 diferencia = cantidad - promedio_diario
                 diferencia_texto = f"+{diferencia:.0f}" if diferencia > 0 else f"{diferencia:.0f}"
-                fecha_formateada = datetime.fromisoformat(fecha).strftime('%d/%m/%Y')
+                fecha_formateada = self._format_bucket(fecha, data)
                 tabla_datos.append([fecha_formateada, str(cantidad), diferencia_texto])
             
             tabla_comensales = Table(tabla_datos, colWidths=[2*inch, 2*inch, 2*inch])
@@ -438,16 +444,16 @@ class KageReportGenerator:
         
         elements.append(footer_table)
 
-def generate_pdf_report(
-    db: Session,
-    start: str,
-    end: str,
+def render_pdf_report(
+    data: dict,
+    start_date: datetime,
+    end_date: datetime,
     sections: List[str]
-):
-    """Generar reporte PDF mejorado"""
-    start_date = datetime.fromisoformat(start.replace("T", " ").split("+")[0])
-    end_date = datetime.fromisoformat(end.replace("T", " ").split("+")[0])
-    
+) -> bytes:
+    """Construir el PDF a partir de datos ya calculados.
+
+    No toca la base de datos, así que puede ejecutarse en otro proceso.
+    """
     buffer = BytesIO()
     doc = SimpleDocTemplate(
         buffer, 
@@ -471,9 +477,6 @@ def generate_pdf_report(
         generator.styles['CustomSubtitle']
     ))
     
-    # Obtener datos
-    data = report_service.get_dashboard_data(db)
-    
     # Crear sección de resumen
     generator._create_summary_metrics(elements, data)
     
@@ -492,12 +495,7 @@ def generate_pdf_report(
     
     # Construir documento
     doc.build(elements)
-    buffer.seek(0)
-    
-    return StreamingResponse(
-        BytesIO(buffer.read()),
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=reporte_kagecontrol_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.pdf"
-        }
-    )
+    return buffer.getvalue()
+
+def report_filename(start_date: datetime, end_date: datetime) -> str:
+    return f"reporte_kagecontrol_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.pdf"
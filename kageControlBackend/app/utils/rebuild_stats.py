@@ -0,0 +1,28 @@
+"""Reconstruir las tablas de agregados de reportes.
+
+Uso:
+    python -m app.utils.rebuild_stats
+    python -m app.utils.rebuild_stats --start 2025-01-01 --end 2025-01-31
+"""
+import argparse
+from datetime import date
+from app.core.database import Base, SessionLocal, engine
+from app.repository import stats_repo
+import app.models  # noqa: F401  (registra todos los modelos en Base.metadata)
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruir agregados de reportes desde las tablas crudas")
+    parser.add_argument("--start", type=date.fromisoformat, help="Primer día a reconstruir (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Último día a reconstruir (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        stats_repo.rebuild(db, args.start, args.end)
+    finally:
+        db.close()
+    print("✅ Agregados reconstruidos.")
+
+if __name__ == "__main__":
+    main()
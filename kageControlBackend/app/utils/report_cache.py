@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.core.config import settings
+from app.models.table import Table
+from app.repository.stats_repo import REPORT_DIRTY_DAYS
+from app.websocket.event_bus import event_bus
+
+def pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # En Windows os.kill(pid, 0) envía CTRL_C: se consulta el proceso con OpenProcess
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class CacheEntry:
+    def __init__(self, path: Path, size: int, start: date, end: date):
+        self.path = path
+        self.size = size
+        self.start = start
+        self.end = end
+
+class ReportCache:
+    """Caché en disco de PDFs renderizados con índice LRU en memoria.
+
+    La clave es un hash de (rango, secciones, granularidad, versión de datos).
+    Cada commit que toca un día incrementa la versión de ese día, de modo que
+    los reportes que lo incluyen dejan de coincidir y se eliminan del disco.
+    Los días modificados se publican en el bus para que los demás workers
+    invaliden también su caché.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        # Un subdirectorio por proceso: cada worker tiene su propio índice
+        self.root = Path(directory)
+        self.directory = self.root / str(os.getpid())
+        self.origin = uuid.uuid4().hex[:12]
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._day_versions = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # El índice no sobrevive a un reinicio, así que los archivos anteriores no son confiables
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._remove_orphans()
+
+    def _remove_orphans(self):
+        """Borrar los subdirectorios de procesos que ya no existen (workers de arranques anteriores)"""
+        if not self.root.is_dir():
+            return
+        for child in self.root.iterdir():
+            if child.is_dir() and child.name.isdigit() and not pid_alive(int(child.name)):
+                shutil.rmtree(child, ignore_errors=True)
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Loop donde publicar los días invalidados (los commits pueden ocurrir en otros hilos)"""
+        self._loop = loop
+
+    def publish(self, days: Iterable[date]):
+        if self._loop is None or self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(
+            event_bus.emit("report_days_changed", {
+                "origin": self.origin,
+                "days": sorted(day.isoformat() for day in days),
+            }),
+            self._loop,
+        )
+
+    def data_version(self, start: datetime, end: datetime) -> int:
+        first, last = start.date(), end.date()
+        with self._lock:
+            return max(
+                (seq for day, seq in self._day_versions.items() if first <= day <= last),
+                default=0,
+            )
+
+    def make_key(self, start: datetime, end: datetime, granularity: str, sections: List[str], version: int) -> str:
+        raw = "|".join([
+            start.isoformat(), end.isoformat(), granularity, ",".join(sorted(set(sections))), str(version)
+        ])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Contenido del PDF leído bajo el lock: una invalidación o un desalojo
+        concurrente no puede borrarlo a mitad de la lectura"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            try:
+                content = entry.path.read_bytes()
+            except FileNotFoundError:
+                self._drop(key)
+                return None
+            self._index.move_to_end(key)
+            return content
+
+    def put(self, key: str, content: bytes, start: datetime, end: datetime, version: int) -> Optional[Path]:
+        """Guardar un PDF; devuelve None si los datos cambiaron mientras se renderizaba"""
+        if len(content) > self.max_bytes or self.data_version(start, end) != version:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{key}.pdf"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        with self._lock:
+            if key in self._index:
+                self._drop(key, remove_file=False)
+            self._index[key] = CacheEntry(path, len(content), start.date(), end.date())
+            self._size += len(content)
+            while self._size > self.max_bytes and self._index:
+                self._drop(next(iter(self._index)))
+        return path
+
+    def invalidate(self, days: Iterable[date]):
+        days = set(days)
+        with self._lock:
+            for day in days:
+                self._seq += 1
+                self._day_versions[day] = self._seq
+            stale = [
+                key for key, entry in self._index.items()
+                if any(entry.start <= day <= entry.end for day in days)
+            ]
+            for key in stale:
+                self._drop(key)
+
+    def _drop(self, key: str, remove_file: bool = True):
+        entry = self._index.pop(key)
+        self._size -= entry.size
+        if remove_file:
+            try:
+                entry.path.unlink()
+            except FileNotFoundError:
+                pass
+
+# Instancia global
+report_cache = ReportCache(settings.REPORT_CACHE_DIR, settings.REPORT_CACHE_MAX_BYTES)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_days(session):
+    days = session.info.pop(REPORT_DIRTY_DAYS, None)
+    if days:
+        report_cache.invalidate(days)
+        report_cache.publish(days)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty_days(session):
+    session.info.pop(REPORT_DIRTY_DAYS, None)
+
+@event.listens_for(Table, "after_insert")
+@event.listens_for(Table, "after_update")
+@event.listens_for(Table, "after_delete")
+def _mark_table_change(mapper, connection, target):
+    # El estado de las mesas es una foto actual: afecta a los reportes que incluyen hoy
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(REPORT_DIRTY_DAYS, set()).add(datetime.utcnow().date())
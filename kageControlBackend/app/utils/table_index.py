@@ -0,0 +1,169 @@
+import bisect
+import enum
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.core.config import settings
+from app.models.table import Table, TableStatus
+
+# Clave en Session.info con los cambios de mesas pendientes de confirmar
+TABLE_INDEX_CHANGES = "table_index_changes"
+
+class AssignmentStrategy(str, enum.Enum):
+    best_fit = "best_fit"
+    zone = "zone"
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+def table_zone(name: str) -> Optional[str]:
+    """Zona de una mesa a partir de su nombre: "Terraza 3" -> "terraza" """
+    zone = re.sub(r"[\d\s#-]+$", "", _normalize(name)).strip()
+    return zone or None
+
+class TableIndex:
+    """Mesas libres ordenadas por capacidad, en memoria.
+
+    Se mantiene una lista ordenada de (capacidad, id) para todas las mesas
+    libres y otra por zona, de modo que la mesa más pequeña en la que cabe un
+    grupo se encuentra con una búsqueda binaria. El índice es solo una guía:
+    quien asigna debe reclamar la mesa en la base de datos.
+    """
+
+    def __init__(self):
+        self._tables: Dict[int, Tuple[int, Optional[str], TableStatus]] = {}
+        self._free: Dict[Optional[str], List[Tuple[int, int]]] = {None: []}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self, db: Session):
+        if self._loaded:
+            return
+        tables = db.query(Table.id, Table.name, Table.capacity, Table.status).all()
+        with self._lock:
+            self._tables.clear()
+            self._free = {None: []}
+            for table_id, name, capacity, status in tables:
+                self._set(table_id, name, capacity, status)
+            self._loaded = True
+
+    def update(self, table_id: int, name: Optional[str] = None, capacity: Optional[int] = None,
+               status: Optional[TableStatus] = None):
+        """Aplicar un cambio (parcial) de una mesa; los campos None se conservan"""
+        with self._lock:
+            if not self._loaded:
+                return
+            previous = self._tables.get(table_id)
+            if previous is None and (capacity is None or status is None):
+                # Mesa desconocida con datos incompletos: se recarga en la próxima asignación
+                self._loaded = False
+                return
+            old_capacity, old_zone, old_status = previous or (None, None, None)
+            self._remove(table_id)
+            self._set(
+                table_id,
+                name,
+                capacity if capacity is not None else old_capacity,
+                TableStatus(status) if status is not None else old_status,
+                zone=old_zone if name is None else None,
+            )
+
+    def invalidate(self):
+        """Forzar una recarga desde la base en la próxima asignación"""
+        with self._lock:
+            self._loaded = False
+
+    def remove(self, table_id: int):
+        with self._lock:
+            self._remove(table_id)
+
+    def candidates(self, party_size: int, preferences: Optional[str] = None,
+                   strategy: Optional[AssignmentStrategy] = None) -> Iterator[int]:
+        """Ids de mesas libres donde cabe el grupo, de la más adecuada a la menos"""
+        strategy = AssignmentStrategy(strategy or settings.TABLE_ASSIGNMENT_STRATEGY)
+        zones = []
+        if strategy == AssignmentStrategy.zone and preferences:
+            wanted = _normalize(preferences)
+            with self._lock:
+                zones = [zone for zone in self._free if zone and zone in wanted]
+        seen = set()
+        for zone in zones + [None]:
+            for table_id in self._fitting(zone, party_size):
+                if table_id not in seen:
+                    seen.add(table_id)
+                    yield table_id
+
+    def _fitting(self, zone: Optional[str], party_size: int) -> Iterator[int]:
+        # Cada paso es una búsqueda binaria desde la última mesa entregada, así
+        # la primera candidata cuesta O(log n) y el índice puede cambiar entre pasos
+        key = (party_size, -1)
+        while True:
+            with self._lock:
+                free = self._free.get(zone, [])
+                position = bisect.bisect_right(free, key)
+                if position >= len(free):
+                    return
+                key = free[position]
+            yield key[1]
+
+    def _set(self, table_id: int, name: Optional[str], capacity: int, status: TableStatus,
+             zone: Optional[str] = None):
+        zone = zone or table_zone(name)
+        self._tables[table_id] = (capacity, zone, status)
+        if status == TableStatus.free:
+            bisect.insort(self._free[None], (capacity, table_id))
+            bisect.insort(self._free.setdefault(zone, []), (capacity, table_id))
+
+    def _remove(self, table_id: int):
+        previous = self._tables.pop(table_id, None)
+        if previous is None:
+            return
+        capacity, zone, status = previous
+        if status != TableStatus.free:
+            return
+        for key in (None, zone):
+            free = self._free.get(key)
+            if free is None:
+                continue
+            position = bisect.bisect_left(free, (capacity, table_id))
+            if position < len(free) and free[position] == (capacity, table_id):
+                free.pop(position)
+            if key is not None and not free:
+                del self._free[key]
+
+# Instancia global
+table_index = TableIndex()
+
+def mark_table_change(db: Session, table_id: int, **fields):
+    """Registrar un cambio de mesa para aplicarlo al índice cuando se confirme"""
+    db.info.setdefault(TABLE_INDEX_CHANGES, []).append((table_id, fields))
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session):
+    for table_id, fields in session.info.pop(TABLE_INDEX_CHANGES, []):
+        if fields.get("deleted"):
+            table_index.remove(table_id)
+        else:
+            table_index.update(table_id, **fields)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(TABLE_INDEX_CHANGES, None)
+
+@event.listens_for(Table, "after_insert")
+@event.listens_for(Table, "after_update")
+def _mark_table_saved(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_table_change(session, target.id, name=target.name, capacity=target.capacity,
+                          status=target.status or TableStatus.free)
+
+@event.listens_for(Table, "after_delete")
+def _mark_table_deleted(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_table_change(session, target.id, deleted=True)
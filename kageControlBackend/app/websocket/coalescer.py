@@ -0,0 +1,32 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+class EventCoalescer:
+    """Junta eventos frecuentes durante una ventana corta y los entrega en lote.
+
+    Por cada clave se conserva solo el último evento; al cerrar la ventana se
+    llama a `flush` con la lista resultante (en orden de primera aparición).
+    """
+
+    def __init__(self, window_seconds: float, flush: Callable[[List[dict]], Awaitable[None]]):
+        self.window_seconds = window_seconds
+        self._flush = flush
+        self._pending: Dict[Hashable, dict] = {}
+        self._timer: Optional[asyncio.Task] = None
+
+    async def add(self, key: Hashable, item: dict):
+        self._pending[key] = item
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.window_seconds)
+        finally:
+            self._timer = None
+        items = list(self._pending.values())
+        self._pending.clear()
+        try:
+            await self._flush(items)
+        except Exception as e:
+            print(f"❌ Error enviando lote de {len(items)} eventos: {e}")
@@ -0,0 +1,131 @@
+import asyncio
+import inspect
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
+from app.core import metrics
+from app.core.config import settings
+
+class HandlerStats:
+    def __init__(self):
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "avg_ms": round(self.total_seconds / self.processed * 1000, 3) if self.processed else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+class EventDispatcher:
+    """Reparte eventos a sus suscriptores con colas acotadas y un número fijo de tareas.
+
+    Cada tipo de evento cae siempre en la misma cola (por hash del nombre o de
+    la clave de cola indicada), así los eventos de un mismo tipo, o de tipos que
+    comparten clave, se procesan en orden. Si una cola está llena,
+    quien emite espera hasta `enqueue_timeout`; pasado ese tiempo el evento se
+    descarta y se cuenta, en lugar de acumular tareas sin límite.
+    """
+
+    def __init__(self, workers: int, queue_size: int, enqueue_timeout: float):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.enqueue_timeout = enqueue_timeout
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._stats: Dict[str, HandlerStats] = {}
+
+    def _shard(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % self.workers
+
+    def _stats_for(self, event_name: str) -> HandlerStats:
+        if event_name not in self._stats:
+            self._stats[event_name] = HandlerStats()
+        return self._stats[event_name]
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._consume(queue)) for queue in self._queues]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+    async def dispatch(self, event_name: str, callbacks: List[Callable], data: dict, shard_key: Optional[str] = None):
+        if not callbacks:
+            return
+        if not self._queues:
+            # Sin dispatcher en marcha (scripts, arranque): se atiende en línea
+            await self._run(event_name, callbacks, data)
+            return
+        queue = self._queues[self._shard(shard_key or event_name)]
+        try:
+            await asyncio.wait_for(queue.put((event_name, callbacks, data)), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self._stats_for(event_name).dropped += 1
+            print(f"⚠️ Cola de eventos llena, '{event_name}' descartado")
+
+    async def _consume(self, queue: asyncio.Queue):
+        while True:
+            event_name, callbacks, data = await queue.get()
+            try:
+                await self._run(event_name, callbacks, data)
+            finally:
+                queue.task_done()
+
+    async def _run(self, event_name: str, callbacks: List[Callable], data: dict):
+        stats = self._stats_for(event_name)
+        for callback in callbacks:
+            started = time.perf_counter()
+            try:
+                result = callback(data)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                stats.failed += 1
+                print(f"❌ Error en handler de '{event_name}' ({getattr(callback, '__name__', callback)}): {e}")
+            finally:
+                elapsed = time.perf_counter() - started
+                stats.processed += 1
+                stats.total_seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": [queue.qsize() for queue in self._queues],
+            "events": {name: s.as_dict() for name, s in self._stats.items()},
+        }
+
+# Instancia global
+dispatcher = EventDispatcher(
+    workers=settings.EVENT_WORKERS,
+    queue_size=settings.EVENT_QUEUE_SIZE,
+    enqueue_timeout=settings.EVENT_ENQUEUE_TIMEOUT,
+)
+
+metrics.Gauge(
+    "event_queue_depth", "Eventos pendientes en cada cola del dispatcher", ("shard",),
+    lambda: {(str(i),): depth for i, depth in enumerate(dispatcher.stats()["queue_depth"])},
+)
+metrics.Gauge(
+    "event_handler_calls_total", "Llamadas a handlers de eventos por evento y resultado", ("event", "result"),
+    lambda: {
+        (name, result): stats[result]
+        for name, stats in dispatcher.stats()["events"].items()
+        for result in ("processed", "failed", "dropped")
+    },
+    kind="counter",
+)
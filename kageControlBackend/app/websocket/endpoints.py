@@ -1,22 +1,78 @@
+import json
+from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.services.kitchen_queue_service import kitchen_queue
 from .manager import manager
+from .table_feed import load_snapshot
 
 router = APIRouter()
 
+def _initial_topics(default: str, topics: Optional[str]):
+    """Tema del endpoint, o los indicados en ?topics=station:parrilla,table:5"""
+    if topics:
+        return [t.strip() for t in topics.split(",") if t.strip()]
+    return [default]
+
+async def _send_tables_snapshot(ws: WebSocket):
+    await manager.send(ws, await load_snapshot())
+
+async def _send_kitchen_snapshot(ws: WebSocket, station: str):
+    # La cola vive en memoria: el snapshot no consulta la base
+    await manager.send(ws, {
+        "event": "kitchen_queue",
+        "station": station,
+        "tickets": [ticket.as_dict() for ticket in kitchen_queue.station(station)],
+    })
+
+async def _listen(ws: WebSocket, on_snapshot=None):
+    """Atender mensajes del cliente:
+    {"action": "subscribe" | "unsubscribe", "topic": "..."} o {"action": "snapshot"}
+    """
+    while True:
+        text = await ws.receive_text()
+        try:
+            message = json.loads(text)
+        except ValueError:
+            continue
+        if not isinstance(message, dict):
+            continue
+        if message.get("action") == "snapshot" and on_snapshot:
+            await on_snapshot(ws)
+            continue
+        if not isinstance(message.get("topic"), str):
+            continue
+        if message.get("action") == "subscribe":
+            manager.subscribe(ws, message["topic"])
+        elif message.get("action") == "unsubscribe":
+            manager.unsubscribe(ws, message["topic"])
+
 @router.websocket("/ws/tables")
-async def websocket_tables(ws: WebSocket):
-    await manager.connect(ws)
+async def websocket_tables(ws: WebSocket, topics: Optional[str] = None):
+    await manager.connect(ws, _initial_topics("tables", topics))
     try:
-        while True:
-            await ws.receive_text()
+        await _listen(ws, on_snapshot=_send_tables_snapshot)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(ws)
 
 @router.websocket("/ws/notifications")
-async def websocket_notifications(ws: WebSocket):
-    await manager.connect(ws)
+async def websocket_notifications(ws: WebSocket, topics: Optional[str] = None):
+    await manager.connect(ws, _initial_topics("orders", topics))
+    try:
+        await _listen(ws)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(ws)
+
+@router.websocket("/ws/kitchen/{station}")
+async def websocket_kitchen(ws: WebSocket, station: str):
+    await manager.connect(ws, [f"kitchen:{station}"])
     try:
-        while True:
-            await ws.receive_text()
+        await _send_kitchen_snapshot(ws, station)
+        await _listen(ws, on_snapshot=lambda ws: _send_kitchen_snapshot(ws, station))
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(ws)
@@ -1,22 +1,171 @@
 import asyncio
-import inspect
-from typing import Callable, Dict, List
+import json
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from .dispatcher import EventDispatcher, dispatcher as default_dispatcher
+
+Deliver = Callable[[str, dict], Awaitable[None]]
+
+# Eventos que deben procesarse en orden entre sí comparten cola en el dispatcher:
+# el cambio de estado de una orden no puede adelantarse a su creación
+SHARD_KEYS = {
+    "order_created": "orders",
+    "orders_created": "orders",
+    "order_status_changed": "orders",
+}
+
+# Espera entre intentos de reconexión al bus (se duplica hasta el máximo)
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 30
+
+class EventBusBackend(ABC):
+    """Transporte del bus: publica eventos y entrega a `deliver` los que recibe.
+
+    Con varios workers, todos los procesos reciben cada evento publicado
+    (incluido el que lo emitió) y lo reparten a sus suscriptores locales.
+    """
+
+    @abstractmethod
+    async def start(self, deliver: Deliver):
+        ...
+
+    @abstractmethod
+    async def publish(self, event_name: str, data: dict):
+        ...
+
+    async def stop(self):
+        pass
+
+class InMemoryBackend(EventBusBackend):
+    """Entrega directa dentro del proceso (un solo worker)"""
 
-class EventBus:
     def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    async def publish(self, event_name: str, data: dict):
+        if self._deliver:
+            await self._deliver(event_name, data)
+
+class RedisBackend(EventBusBackend):
+    """Pub/sub sobre el protocolo Redis (Redis, Valkey o cualquier servidor compatible)"""
+
+    def __init__(self, url: str, channel: str):
+        self.url = url
+        self.channel = channel
+        self._client = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._connection_errors: tuple = (OSError,)
+
+    async def start(self, deliver: Deliver):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("EVENT_BUS_BACKEND=redis requiere el paquete 'redis'") from e
+        from redis.exceptions import ConnectionError, TimeoutError
+        self._connection_errors = (ConnectionError, TimeoutError, OSError)
+        self._client = redis.from_url(self.url)
+        await self._subscribe()
+        self._reader = asyncio.create_task(self._read(deliver))
+
+    async def _subscribe(self):
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+
+    async def _close_pubsub(self):
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is None:
+            return
+        try:
+            await pubsub.close()
+        except Exception:
+            pass
+
+    async def _read(self, deliver: Deliver):
+        # Si se cae la conexión se vuelve a suscribir con espera creciente; los
+        # eventos publicados mientras tanto se pierden (pub/sub no los guarda)
+        delay = RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._subscribe()
+                    print("✅ Reconectado al bus de eventos.")
+                delay = RECONNECT_MIN_SECONDS
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        payload = json.loads(message["data"])
+                        await deliver(payload["event"], payload["data"])
+                    except Exception as e:
+                        print(f"⚠️ Evento del bus descartado: {e}")
+                raise ConnectionResetError("la suscripción terminó")
+            except self._connection_errors as e:
+                print(f"⚠️ Conexión con el bus de eventos perdida ({e}), reintentando en {delay:.0f} s.")
+            except Exception as e:
+                # Cualquier otro error tampoco puede dejar al worker sin recibir eventos
+                print(f"❌ Error inesperado leyendo el bus de eventos ({type(e).__name__}: {e}), "
+                      f"reintentando en {delay:.0f} s.")
+            await self._close_pubsub()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    async def publish(self, event_name: str, data: dict):
+        await self._client.publish(self.channel, json.dumps({"event": event_name, "data": data}, default=str))
+
+    async def stop(self):
+        if self._reader:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        if self._pubsub:
+            try:
+                await self._pubsub.unsubscribe(self.channel)
+            except self._connection_errors:
+                pass
+            await self._close_pubsub()
+        if self._client:
+            await self._client.close()
+
+class EventBus:
+    def __init__(self, backend: Optional[EventBusBackend] = None, dispatcher: Optional[EventDispatcher] = None):
         self._subscribers: Dict[str, List[Callable]] = {}
+        self.backend = backend or InMemoryBackend()
+        self.dispatcher = dispatcher or default_dispatcher
 
     def subscribe(self, event_name: str, callback: Callable):
         if event_name not in self._subscribers:
             self._subscribers[event_name] = []
         self._subscribers[event_name].append(callback)
 
+    async def start(self):
+        self.dispatcher.start()
+        await self.backend.start(self._dispatch)
+
+    async def stop(self):
+        await self.backend.stop()
+        await self.dispatcher.stop()
+
     async def emit(self, event_name: str, data: dict):
-        for callback in self._subscribers.get(event_name, []):
-            if inspect.iscoroutinefunction(callback):
-                asyncio.create_task(callback(data))
-            else:
-                callback(data)
+        # Se emite después del commit: si falla la notificación, la escritura ya está
+        # confirmada y la petición no debe terminar en error
+        try:
+            await self.backend.publish(event_name, data)
+        except Exception as e:
+            print(f"⚠️ No se pudo publicar el evento '{event_name}': {e}")
+
+    async def _dispatch(self, event_name: str, data: dict):
+        await self.dispatcher.dispatch(
+            event_name, self._subscribers.get(event_name, []), data, SHARD_KEYS.get(event_name)
+        )
+
+def create_backend() -> EventBusBackend:
+    if settings.EVENT_BUS_BACKEND == "redis":
+        return RedisBackend(settings.EVENT_BUS_URL, settings.EVENT_BUS_CHANNEL)
+    return InMemoryBackend()
 
 # Instancia global
-event_bus = EventBus()
+event_bus = EventBus(create_backend())
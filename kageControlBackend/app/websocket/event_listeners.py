@@ -1,5 +1,22 @@
+from datetime import date, datetime
+from app.core.config import settings
+from app.services.kitchen_queue_service import kitchen_queue
+from app.utils.entity_versions import entity_versions
+from app.utils.report_cache import report_cache
+from app.utils.table_index import table_index
+from .coalescer import EventCoalescer
 from .event_bus import event_bus
 from .manager import manager
+from .table_feed import load_snapshot, table_feed
+
+def _order_topics(data: dict):
+    """Temas interesados en una orden: todas las órdenes, su estación y su llegada"""
+    topics = ["orders"]
+    if data.get("station"):
+        topics.append(f"station:{data['station']}")
+    if data.get("arrival_id") is not None:
+        topics.append(f"arrival:{data['arrival_id']}")
+    return topics
 
 async def on_order_created(data: dict):
     print(f"🆕 Nueva orden creada (ID: {data['order_id']}) para llegada {data['arrival_id']}.")
@@ -7,16 +24,112 @@ async def on_order_created(data: dict):
         "event": "order_created",
         "order_id": data["order_id"],
         "arrival_id": data["arrival_id"],
-    })
+        "station": data.get("station"),
+    }, *_order_topics(data))
 
-async def on_order_status_changed(data: dict):
-    print(f"🔁 Orden {data['order_id']} cambió al estado '{data['status']}'.")
+async def on_orders_created(data: dict):
+    print(f"🆕 {len(data['orders'])} órdenes creadas en lote.")
+    topics = {topic for order in data["orders"] for topic in _order_topics(order)}
     await manager.broadcast({
-        "event": "order_status_changed",
+        "event": "orders_created",
+        "orders": data["orders"],
+    }, *topics)
+
+async def _kitchen_upsert(data: dict):
+    fired_at = datetime.fromisoformat(data["fired_at"]) if data.get("fired_at") else None
+    ticket = kitchen_queue.add(
+        data["order_id"], data.get("arrival_id"), data.get("station"),
+        data.get("status", "pending"), data.get("dishes", []), fired_at=fired_at,
+    )
+    if ticket:
+        await manager.broadcast({"event": "kitchen_ticket", "ticket": ticket.as_dict()}, f"kitchen:{ticket.station}")
+
+async def on_kitchen_order_created(data: dict):
+    await _kitchen_upsert(data)
+
+async def on_kitchen_orders_created(data: dict):
+    for order in data["orders"]:
+        await _kitchen_upsert(order)
+
+async def on_kitchen_status_changed(data: dict):
+    ticket = kitchen_queue.update_status(data["order_id"], data.get("station"), data["status"])
+    if not ticket:
+        return
+    topic = f"kitchen:{ticket.station}"
+    if ticket.status == "served":
+        await manager.broadcast({"event": "kitchen_ticket_removed", "order_id": ticket.order_id}, topic)
+    else:
+        await manager.broadcast({"event": "kitchen_ticket", "ticket": ticket.as_dict()}, topic)
+
+def _status_change(data: dict) -> dict:
+    return {
         "order_id": data["order_id"],
+        "arrival_id": data.get("arrival_id"),
+        "station": data.get("station"),
         "status": data["status"],
-    })
+    }
+
+async def _flush_status_changes(changes: list):
+    # Un frame por estación para que cada cocina solo reciba sus órdenes
+    by_station = {}
+    for change in changes:
+        by_station.setdefault(change["station"], []).append(change)
+    for station_changes in by_station.values():
+        if len(station_changes) == 1:
+            change = station_changes[0]
+            await manager.broadcast({"event": "order_status_changed", **change}, *_order_topics(change))
+            continue
+        topics = {topic for change in station_changes for topic in _order_topics(change)}
+        await manager.broadcast({
+            "event": "order_status_batch",
+            "orders": station_changes,
+        }, *topics)
+
+status_coalescer = EventCoalescer(settings.EVENT_COALESCE_MS / 1000, _flush_status_changes)
+
+async def on_order_status_changed(data: dict):
+    print(f"🔁 Orden {data['order_id']} cambió al estado '{data['status']}'.")
+    change = _status_change(data)
+    if settings.EVENT_COALESCE_MS > 0:
+        # Solo el último estado de cada orden dentro de la ventana
+        await status_coalescer.add(change["order_id"], change)
+    else:
+        await _flush_status_changes([change])
+
+async def on_table_changed(data: dict):
+    table_id = data["table_id"]
+    # Cambios hechos en otros workers llegan por el bus
+    table_index.update(table_id, **data["fields"])
+    await manager.broadcast(table_feed.changed(table_id, data["fields"]), "tables", f"table:{table_id}")
+
+async def on_table_deleted(data: dict):
+    table_id = data["table_id"]
+    table_index.remove(table_id)
+    await manager.broadcast(table_feed.deleted(table_id), "tables", f"table:{table_id}")
+
+async def on_tables_refreshed(data: dict):
+    # Cada worker lee las mesas al entregar el evento, con su propia versión tomada antes
+    await manager.broadcast(await load_snapshot(), "tables")
+
+def on_entities_changed(data: dict):
+    # Los cambios propios ya se aplicaron al confirmar la transacción
+    if data["origin"] != entity_versions.origin:
+        entity_versions.bump(data["entities"])
+
+def on_report_days_changed(data: dict):
+    # Días modificados en otro worker: sus PDFs en caché local ya no sirven
+    if data["origin"] != report_cache.origin:
+        report_cache.invalidate(date.fromisoformat(day) for day in data["days"])
 
 def register_listeners():
     event_bus.subscribe("order_created", on_order_created)
+    event_bus.subscribe("orders_created", on_orders_created)
     event_bus.subscribe("order_status_changed", on_order_status_changed)
+    event_bus.subscribe("order_created", on_kitchen_order_created)
+    event_bus.subscribe("orders_created", on_kitchen_orders_created)
+    event_bus.subscribe("order_status_changed", on_kitchen_status_changed)
+    event_bus.subscribe("table_changed", on_table_changed)
+    event_bus.subscribe("table_deleted", on_table_deleted)
+    event_bus.subscribe("tables_refreshed", on_tables_refreshed)
+    event_bus.subscribe("entities_changed", on_entities_changed)
+    event_bus.subscribe("report_days_changed", on_report_days_changed)
@@ -1,27 +1,165 @@
-from fastapi import WebSocket, WebSocketDisconnect
-from typing import List
+import asyncio
+import enum
+import json
+import time
+from fastapi import WebSocket
+from typing import Dict, Iterable, Optional, Set
+from app.core import metrics
+from app.core.config import settings
+
+try:
+    import orjson
+
+    def encode_message(message: dict) -> str:
+        return orjson.dumps(message, default=str).decode()
+except ImportError:  # orjson es opcional; json de la stdlib produce el mismo frame
+    def encode_message(message: dict) -> str:
+        return json.dumps(message, separators=(",", ":"), default=str)
+
+broadcast_duration = metrics.Histogram(
+    "websocket_broadcast_duration_seconds",
+    "Tiempo de serializar y encolar un broadcast para todos sus destinatarios",
+    labels=("event",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+class OverflowPolicy(str, enum.Enum):
+    drop_oldest = "drop_oldest"
+    disconnect = "disconnect"
+
+class ClientConnection:
+    """Una conexión con su cola de frames ya serializados y su tarea escritora"""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.topics: Set[str] = set()
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """Cada cliente tiene su propia cola y tarea de envío, así un cliente lento
+    no retrasa a los demás: broadcast solo encola y vuelve de inmediato.
+
+    Los clientes se suscriben a temas (p. ej. "tables", "orders",
+    "station:parrilla", "table:5") y cada mensaje solo se entrega a los
+    suscriptores de alguno de sus temas.
+    """
 
-    async def connect(self, websocket: WebSocket):
+    def __init__(self, queue_size: int, overflow_policy: OverflowPolicy, send_timeout: float):
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self._subscribers: Dict[str, Set[ClientConnection]] = {}
+        # Cierres en curso: asyncio solo guarda referencias débiles a las tareas
+        self._closing: Set[asyncio.Task] = set()
+
+    async def connect(self, websocket: WebSocket, topics: Iterable[str] = ()):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = ClientConnection(websocket, self.queue_size)
+        client.writer = asyncio.create_task(self._writer(client))
+        self.active_connections[websocket] = client
+        for topic in topics:
+            self.subscribe(websocket, topic)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        client = self.active_connections.get(websocket)
+        if not client:
+            return
+        # Quitar de los temas antes de sacarlo de active_connections, que es donde lo busca unsubscribe
+        for topic in list(client.topics):
+            self.unsubscribe(websocket, topic)
+        del self.active_connections[websocket]
+        if client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    def subscribe(self, websocket: WebSocket, topic: str):
+        client = self.active_connections.get(websocket)
+        if client:
+            client.topics.add(topic)
+            self._subscribers.setdefault(topic, set()).add(client)
 
-    async def broadcast(self, message: dict):
-        living: List[WebSocket] = []
-        for ws in self.active_connections:
+    def unsubscribe(self, websocket: WebSocket, topic: str):
+        client = self.active_connections.get(websocket)
+        if not client:
+            return
+        client.topics.discard(topic)
+        subscribers = self._subscribers.get(topic)
+        if subscribers is not None:
+            subscribers.discard(client)
+            if not subscribers:
+                del self._subscribers[topic]
+
+    async def send(self, websocket: WebSocket, message: dict):
+        """Enviar un mensaje a un único cliente (p. ej. un snapshot solicitado)"""
+        client = self.active_connections.get(websocket)
+        if client:
+            self._enqueue(client, encode_message(message))
+
+    async def broadcast(self, message: dict, *topics: str):
+        """Enviar a los suscriptores de cualquiera de los temas (a todos si no se indica ninguno).
+
+        El mensaje se serializa una sola vez y el mismo frame se encola para
+        cada destinatario.
+        """
+        if topics:
+            recipients = set()
+            for topic in topics:
+                recipients |= self._subscribers.get(topic, set())
+        else:
+            recipients = list(self.active_connections.values())
+        if not recipients:
+            return
+        started = time.perf_counter()
+        frame = encode_message(message)
+        for client in recipients:
+            self._enqueue(client, frame)
+        broadcast_duration.observe(time.perf_counter() - started, event=message.get("event", ""))
+
+    def _enqueue(self, client: ClientConnection, frame: str):
+        try:
+            client.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            if self.overflow_policy == OverflowPolicy.drop_oldest:
+                client.queue.get_nowait()
+                client.queue.put_nowait(frame)
+            else:
+                print("⚠️ Cola de WebSocket llena, se desconecta el cliente.")
+                self._drop(client)
+
+    async def _writer(self, client: ClientConnection):
+        while True:
+            frame = await client.queue.get()
             try:
-                await ws.send_json(message)
-                living.append(ws)
-            except WebSocketDisconnect:
-                pass
-        self.active_connections = living
+                await asyncio.wait_for(client.websocket.send_text(frame), timeout=self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Timeout, desconexión o cualquier error de envío: solo afecta a este cliente
+                print(f"⚠️ Error enviando por WebSocket ({type(e).__name__}), se desconecta el cliente.")
+                self._drop(client)
+                return
+
+    def _drop(self, client: ClientConnection):
+        self.disconnect(client.websocket)
+        task = asyncio.create_task(self._close(client.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
 
 # Instancia global
-manager = ConnectionManager()
+manager = ConnectionManager(
+    queue_size=settings.WS_QUEUE_SIZE,
+    overflow_policy=OverflowPolicy(settings.WS_OVERFLOW_POLICY),
+    send_timeout=settings.WS_SEND_TIMEOUT,
+)
+
+metrics.Gauge(
+    "websocket_connections", "Conexiones WebSocket activas", (),
+    lambda: {(): len(manager.active_connections)},
+)
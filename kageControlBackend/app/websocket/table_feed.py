@@ -0,0 +1,56 @@
+from typing import Iterable, Optional
+from app.core.database import AsyncSessionLocal
+from app.schemas.table import TableSchema
+from app.services import table_service
+
+class TableFeed:
+    """Eventos de mesas con versión creciente.
+
+    Cada cambio se envía como un delta de una sola mesa; el cliente que
+    detecta un salto de versión pide un snapshot completo. La versión es
+    propia de cada proceso: se asigna al entregar el evento del bus, no al
+    emitirlo, para que sea continua en los sockets de cada worker.
+    """
+
+    def __init__(self):
+        self.version = 0
+
+    def _next_version(self) -> int:
+        self.version += 1
+        return self.version
+
+    def changed(self, table_id: int, fields: dict) -> dict:
+        return {
+            "event": "table_changed",
+            "table_id": table_id,
+            "version": self._next_version(),
+            "fields": {
+                key: value.value if hasattr(value, "value") else value
+                for key, value in fields.items()
+            },
+        }
+
+    def deleted(self, table_id: int) -> dict:
+        return {
+            "event": "table_deleted",
+            "table_id": table_id,
+            "version": self._next_version(),
+        }
+
+    def snapshot(self, tables: Iterable, version: Optional[int] = None) -> dict:
+        """`version` debe leerse antes de consultar las mesas: si llega un delta durante
+        la consulta, el cliente lo aplica encima en lugar de descartarlo como viejo"""
+        return {
+            "event": "update_tables",
+            "version": self.version if version is None else version,
+            "tables": [t if isinstance(t, dict) else TableSchema.from_orm(t).dict() for t in tables],
+        }
+
+# Instancia global
+table_feed = TableFeed()
+
+async def load_snapshot() -> dict:
+    version = table_feed.version
+    async with AsyncSessionLocal() as db:
+        tables = await table_service.get_all_tables_async(db)
+    return table_feed.snapshot(tables, version)
@@ -0,0 +1,18 @@
+// src/api/pagination.js
+// Los listados paginados devuelven una lista y, si hay más, el cursor de la
+// siguiente página en el header X-Next-Cursor. Usar siempre con filtros
+// (active, start, status...) para no recorrer todo el historial.
+const PAGE_SIZE = 500; // máximo que acepta el backend
+
+export async function fetchAllPages(client, url, params = {}) {
+  const items = [];
+  let cursor = null;
+  do {
+    const res = await client.get(url, {
+      params: { limit: PAGE_SIZE, ...params, ...(cursor ? { cursor } : {}) },
+    });
+    items.push(...res.data);
+    cursor = res.headers["x-next-cursor"] || null;
+  } while (cursor);
+  return items;
+}
@@ -9,3 +9,43 @@ export function connectWebSocket(path = '/ws/tables', onMessage, onError, onClos
 
   return socket;
 }
+
+// Sigue la versión de los eventos de mesas y pide un snapshot completo
+// al conectar o cuando detecta que se perdió algún delta.
+export function trackTableVersions(socket) {
+  let lastVersion = null;
+  const requestSnapshot = () => {
+    if (socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ action: 'snapshot' }));
+    }
+  };
+  socket.addEventListener('open', requestSnapshot);
+
+  return (data) => {
+    if (typeof data.version !== 'number') return;
+    if (data.event === 'update_tables') {
+      lastVersion = data.version;
+      return;
+    }
+    if (lastVersion !== null && data.version !== lastVersion + 1) {
+      requestSnapshot();
+    }
+    lastVersion = data.version;
+  };
+}
+
+// Aplica un evento de mesa (delta o snapshot) a la lista local
+export function applyTableEvent(tables, data) {
+  if (data.event === 'update_tables' && Array.isArray(data.tables)) {
+    return data.tables;
+  }
+  if (data.event === 'table_deleted') {
+    return tables.filter((t) => t.id !== data.table_id);
+  }
+  if (data.event === 'table_changed') {
+    const exists = tables.some((t) => t.id === data.table_id);
+    if (!exists) return [...tables, { id: data.table_id, ...data.fields }];
+    return tables.map((t) => (t.id === data.table_id ? { ...t, ...data.fields } : t));
+  }
+  return tables;
+}
@@ -7,7 +7,11 @@ const shownNotifications = new Set();
 
 // Construye una clave única por evento y orden (y llegada)
 const buildKey = (data) =>
-  `${data.event}-${data.order_id}-${data.arrival_id ?? ""}`;
+  Array.isArray(data.orders)
+    ? `${data.event}-${data.orders
+        .map((o) => `${o.order_id}${o.status ? `:${o.status}` : ""}`)
+        .join(",")}`
+    : `${data.event}-${data.order_id}-${data.arrival_id ?? ""}`;
 
 export default function NotificacionesSocket() {
   const socketRef = useRef(null);
@@ -45,6 +49,16 @@ export default function NotificacionesSocket() {
             });
           }
 
+          if (data.event === "orders_created" && Array.isArray(data.orders)) {
+            butterup.toast({
+              title: "Nuevas órdenes",
+              message: `${data.orders.length} órdenes: ${data.orders
+                .map((o) => `#${o.order_id}`)
+                .join(", ")}.`,
+              type: "info",
+            });
+          }
+
           if (data.event === "order_status_changed") {
             butterup.toast({
               title: "Estado pedido",
@@ -52,6 +66,17 @@ export default function NotificacionesSocket() {
               type: "success",
             });
           }
+
+          // Cambios de estado agrupados por el servidor en una ventana corta
+          if (data.event === "order_status_batch" && Array.isArray(data.orders)) {
+            butterup.toast({
+              title: "Estado pedidos",
+              message: data.orders
+                .map((o) => `#${o.order_id} → ${o.status}`)
+                .join(", "),
+              type: "success",
+            });
+          }
         } catch (err) {
           console.error("❌ Parse WS:", err);
         }
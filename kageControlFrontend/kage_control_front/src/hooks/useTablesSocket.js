@@ -1,6 +1,10 @@
 import { useEffect, useState } from "react";
 import axiosClient from "../api/axiosClient";
-import { connectWebSocket } from "../api/websocketClient";
+import {
+  connectWebSocket,
+  trackTableVersions,
+  applyTableEvent,
+} from "../api/websocketClient";
 
 export function useTablesSocket() {
   const [tables, setTables] = useState([]);
@@ -26,13 +30,13 @@ export function useTablesSocket() {
     const socket = connectWebSocket(
       "/ws/tables",
       (data) => {
-        if (data.event === "update_tables" && Array.isArray(data.tables)) {
-          setTables(data.tables);
-        }
+        trackVersion(data);
+        setTables((current) => applyTableEvent(current, data));
       },
       (err) => console.error("WS error:", err),
       (ev) => console.log("WS closed:", ev)
     );
+    const trackVersion = trackTableVersions(socket);
 
     return () => {
       isMounted = false;
@@ -1,7 +1,7 @@
 import { useEffect, useState, useCallback } from "react";
 import { PlusCircle, Users, Trash2, LayoutTemplate } from "lucide-react";
 import axiosClient from "../../../api/axiosClient";
-import { connectWebSocket } from "../../../api/websocketClient";
+import { connectWebSocket, trackTableVersions } from "../../../api/websocketClient";
 import butterup from "butteruptoasts";
 import { motion, AnimatePresence } from "framer-motion";
 import "../../../styles/butterup-2.0.0/butterup-2.0.0/butterup.css";
@@ -75,6 +75,28 @@ export default function EditorMesas() {
     
     const ws = connectWebSocket("/ws/tables", (data) => {
       console.log("WebSocket evento recibido:", data.event);
+      trackVersion(data);
+
+      if (data.event === "table_changed") {
+        setMesas(mesasActuales => {
+          const mesaLocal = mesasActuales.find(m => m.id === data.table_id);
+          if (mesaLocal) {
+            return mesasActuales.map(m => (m.id === data.table_id ? { ...m, ...data.fields } : m));
+          }
+          // Mesa nueva: asignar posición ordenada
+          const pos = mesasActuales.filter(m => m.piso === 1).length;
+          return [
+            ...mesasActuales,
+            {
+              id: data.table_id,
+              ...data.fields,
+              piso: 1,
+              x: 60 + (pos % 5) * 120,
+              y: 60 + Math.floor(pos / 5) * 120,
+            },
+          ];
+        });
+      }
       
       if (data.event === "table_deleted" && data.table_id) {
         console.log("Mesa eliminada via WebSocket:", data.table_id);
@@ -131,6 +153,8 @@ export default function EditorMesas() {
       }
     });
 
+    const trackVersion = trackTableVersions(ws);
+
     return () => ws.close();
   }, []); // Sin dependencias para evitar reconexiones
 
@@ -1,6 +1,7 @@
 import { useState, useEffect } from "react";
 import axios from "axios";
 import butterup from "butteruptoasts";
+import { fetchAllPages } from "../../../api/pagination";
 import { motion, AnimatePresence } from "framer-motion";
 import { 
   Search, Filter, Clock, ChefHat, CheckCircle, Package, 
@@ -153,9 +154,14 @@ export default function Estado() {
     if (Object.keys(tables).length === 0 || Object.keys(menu).length === 0) return;
     setLoading(true);
     try {
-      const res = await axios.get("http://localhost:8000/orders/");
+      // Solo las órdenes del servicio de hoy (por hora de llegada), no todo el historial
+      const inicioDelDia = new Date();
+      inicioDelDia.setHours(0, 0, 0, 0);
+      const orders = await fetchAllPages(axios, "http://localhost:8000/orders/", {
+        start: inicioDelDia.toISOString(),
+      });
       const allDishes = [];
-      res.data.forEach((order) => {
+      orders.forEach((order) => {
         order.dishes.forEach((dish, i) => {
           const platillo = menu[dish.dish_id] || {};
           allDishes.push({
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import axios from "axios";
 import butterup from "butteruptoasts";
+import { fetchAllPages } from "../../../api/pagination";
 import { motion, AnimatePresence } from "framer-motion";
 import { 
   ShoppingCart, Plus, Minus, Trash2, CheckCircle, Clock, 
@@ -130,8 +131,7 @@ export default function Ordenes() {
 
   const cargarUsuarios = async () => {
     try {
-      const res = await axios.get("http://localhost:8000/arrivals/");
-      setUsuarios(res.data);
+      setUsuarios(await fetchAllPages(axios, "http://localhost:8000/arrivals/", { active: true }));
     } catch (error) {
       butterup.toast({
         title: "Error",
@@ -2,6 +2,7 @@ import { useState, useMemo, useEffect } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { useTablesSocket } from "../../../hooks/useTablesSocket";
 import axiosClient from "../../../api/axiosClient";
+import { fetchAllPages } from "../../../api/pagination";
 
 const TABLES_POSITIONS = {
   1: [
@@ -51,7 +52,8 @@ export default function PlanoMesas() {
   const [modalData, setModalData] = useState(null);
 
   useEffect(() => {
-    axiosClient.get("/arrivals").then((res) => setArrivals(res.data));
+    // Solo las llegadas sentadas ahora: una por mesa ocupada
+    fetchAllPages(axiosClient, "/arrivals", { active: true }).then(setArrivals);
   }, []);
 
   const mesasEstado = useMemo(() => {